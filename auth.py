@@ -1,30 +1,43 @@
 import os
+import time
+from collections import namedtuple
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+import cache
 import models
 from database import SessionLocal
+from passwords import hash_password, check_password
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "60"))  # seconds
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# What get_current_user returns: the user's columns, detached from any session
+UserSnapshot = namedtuple("UserSnapshot", "id name email role created_at")
+
+# Token signature -> (signed header.payload, claims, UserSnapshot)
+token_cache = cache.TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+@cache.on_table_change("users", operations=("update", "delete"))
+def invalidate_token_cache(table_name):
+    token_cache.invalidate()
 
 # Security scheme
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
+# Blocking bcrypt helpers; request handlers use the passwords pool instead
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return check_password(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -46,24 +59,49 @@ def verify_token(token: str):
     except JWTError:
         return None
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(SessionLocal)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return user_from_token(credentials.credentials)
+
+def user_from_token(token: str):
+    """UserSnapshot for a bearer token (cached per token signature)"""
+    credentials_exception = _credentials_exception()
+    signing_input, _, signature = token.rpartition(".")
+    cached = token_cache.get(signature)
+    if cached is not None and cached[0] == signing_input:
+        return cached[2]
     
-    email = verify_token(credentials.credentials)
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    email = claims.get("sub")
     if email is None:
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if user is None:
+    with SessionLocal() as db:
+        row = db.query(
+            models.User.id, models.User.name, models.User.email, models.User.role, models.User.created_at
+        ).filter(models.User.email == email).first()
+    if row is None:
         raise credentials_exception
     
+    user = UserSnapshot(*row)
+    # Never serve a cached entry past the token's own expiry
+    ttl = AUTH_CACHE_TTL
+    if claims.get("exp"):
+        ttl = min(ttl, claims["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(signature, (signing_input, claims, user), ttl=ttl)
     return user
 
-def get_current_host(current_user: models.User = Depends(get_current_user)):
+def get_current_host(current_user: UserSnapshot = Depends(get_current_user)):
     if current_user.role != "host":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -71,7 +109,17 @@ def get_current_host(current_user: models.User = Depends(get_current_user)):
         )
     return current_user
 
-def get_current_participant(current_user: models.User = Depends(get_current_user)):
+def get_current_host_for_stream(
+    access_token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+):
+    """get_current_host that also accepts ?access_token=, since EventSource cannot send headers"""
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise _credentials_exception()
+    return get_current_host(user_from_token(token))
+
+def get_current_participant(current_user: UserSnapshot = Depends(get_current_user)):
     if current_user.role != "participant":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark for the exam system.
+
+Drives the FastAPI app in-process through an ASGI client (no live server
+needed) against a throwaway database. N candidates run concurrently through
+start_exam_simple -> exam questions -> k x submit_answer -> end_exam while
+host dashboard pollers hit the monitoring endpoints in parallel.
+
+Reports p50/p95/p99 latency, throughput and SQL statements per endpoint, and
+can save the results as a baseline JSON file that later runs diff against.
+
+Usage:
+    python benchmark.py --candidates 50 --answers 10 --save benchmark_baseline.json
+    python benchmark.py --candidates 50 --answers 10 --compare benchmark_baseline.json
+
+Requires httpx (pip install httpx). By default a fresh SQLite file in a
+temporary directory is used; pass --database-url to benchmark a local
+PostgreSQL database (its tables are created and seeded, so use a scratch DB).
+"""
+
+import argparse
+import asyncio
+import contextvars
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Host dashboard endpoints polled by host.js / host_forms.js
+HOST_POLL_PATHS = [
+    ("GET /api/stats", "/api/stats"),
+    ("GET /api/participants", "/api/participants"),
+    ("GET /api/recent_violations", "/api/recent_violations"),
+    ("GET /api/exam/{id}/stats", "/api/exam/{exam_id}/stats"),
+    ("GET /api/exam/{id}/activity", "/api/exam/{exam_id}/activity"),
+]
+
+# Endpoint label of the request currently running, used to attribute SQL statements
+current_endpoint = contextvars.ContextVar("current_endpoint", default=None)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Collects latencies, errors and SQL statement counts per endpoint"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.statements = {}
+
+    def count_statement(self, conn, cursor, statement, parameters, context, executemany):
+        label = current_endpoint.get() or "(unattributed)"
+        self.statements[label] = self.statements.get(label, 0) + 1
+
+    async def request(self, client, label, method, url, **kwargs):
+        token = current_endpoint.set(label)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_endpoint.reset(token)
+            self.latencies.setdefault(label, []).append(elapsed)
+        if response.status_code >= 400:
+            self.errors[label] = self.errors.get(label, 0) + 1
+        return response
+
+    def summary(self, wall_seconds):
+        endpoints = {}
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            count = len(values)
+            endpoints[label] = {
+                "requests": count,
+                "errors": self.errors.get(label, 0),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "mean_ms": round(sum(values) / count * 1000, 2),
+                "throughput_rps": round(count / wall_seconds, 2) if wall_seconds else 0.0,
+                "statements_per_request": round(self.statements.get(label, 0) / count, 2),
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {
+            "wall_seconds": round(wall_seconds, 3),
+            "total_requests": total,
+            "throughput_rps": round(total / wall_seconds, 2) if wall_seconds else 0.0,
+            "unattributed_statements": self.statements.get("(unattributed)", 0),
+            "endpoints": endpoints,
+        }
+
+
+async def setup_exam(client, question_count):
+    """Create the benchmark exam with its questions through the host APIs"""
+    response = await client.post("/api/create_exam", json={"title": "Benchmark exam", "duration": 60})
+    exam_id = response.json()["exam_id"]
+    for index in range(question_count):
+        await client.post("/api/create_question", data={
+            "text": f"Benchmark question {index + 1}",
+            "options": json.dumps(["A", "B", "C", "D"]),
+            "correct_answer": "B",
+            "exam_id": exam_id,
+        })
+    return exam_id
+
+
+async def run_candidate(client, recorder, exam_id, number, answers):
+    response = await recorder.request(client, "POST /start_exam_simple", "POST", "/start_exam_simple", data={
+        "name": f"Candidate {number}",
+        "email": f"candidate{number}@benchmark.test",
+        "exam_id": exam_id,
+    })
+    attempt_id = response.json()["exam_attempt_id"]
+
+    response = await recorder.request(client, "GET /api/exam/{id}/questions", "GET", f"/api/exam/{exam_id}/questions")
+    questions = response.json()[:answers]
+
+    for index, question in enumerate(questions):
+        await recorder.request(client, "POST /submit_answer", "POST", "/submit_answer", data={
+            "attempt_id": attempt_id,
+            "question_id": question["id"],
+            "user_answer": question["correct_answer"] if (number + index) % 3 else "A",
+            "time_taken_seconds": 5 + (number + index) % 20,
+        })
+
+    await recorder.request(client, "POST /end_exam", "POST", f"/end_exam?attempt_id={attempt_id}")
+
+
+async def run_poller(client, recorder, exam_id, interval, stop):
+    while not stop.is_set():
+        for label, path in HOST_POLL_PATHS:
+            await recorder.request(client, label, "GET", path.format(exam_id=exam_id))
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_benchmark(args):
+    import httpx
+    from sqlalchemy import event
+
+    import main
+    from database import engine, async_engine
+
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            exam_id = await setup_exam(client, max(args.answers, 1))
+
+            for sync_engine in (engine, async_engine.sync_engine):
+                event.listen(sync_engine, "before_cursor_execute", recorder.count_statement)
+
+            stop = asyncio.Event()
+            pollers = [
+                asyncio.create_task(run_poller(client, recorder, exam_id, args.poll_interval, stop))
+                for _ in range(args.pollers)
+            ]
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                run_candidate(client, recorder, exam_id, number, args.answers)
+                for number in range(args.candidates)
+            ))
+            wall_seconds = time.perf_counter() - start
+            stop.set()
+            await asyncio.gather(*pollers)
+
+            for sync_engine in (engine, async_engine.sync_engine):
+                event.remove(sync_engine, "before_cursor_execute", recorder.count_statement)
+
+    return recorder.summary(wall_seconds)
+
+
+def print_report(results):
+    print(f"\n📊 {results['total_requests']} requests in {results['wall_seconds']}s "
+          f"({results['throughput_rps']} req/s)")
+    header = f"{'endpoint':<34}{'reqs':>6}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>8}{'SQL/req':>9}"
+    print(header)
+    print("-" * len(header))
+    for label, stats in results["endpoints"].items():
+        print(f"{label:<34}{stats['requests']:>6}{stats['errors']:>5}{stats['p50_ms']:>9.2f}"
+              f"{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['throughput_rps']:>8.1f}"
+              f"{stats['statements_per_request']:>9.2f}")
+    if results["unattributed_statements"]:
+        print(f"(+{results['unattributed_statements']} SQL statements outside benchmarked requests)")
+
+
+def compare(results, baseline, threshold):
+    """Print the change against a baseline; returns the number of regressions over ``threshold`` percent"""
+    print(f"\n🔍 Compared with baseline from {baseline.get('generated_at', 'unknown')}")
+    regressions = 0
+    for label, stats in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(label)
+        if not before:
+            print(f"  {label}: new endpoint")
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "statements_per_request"):
+            old, new = before.get(key, 0), stats[key]
+            delta = ((new - old) / old * 100) if old else 0.0
+            mark = ""
+            if delta > threshold:
+                mark = " ❌"
+                regressions += 1
+            changes.append(f"{key} {old} -> {new} ({delta:+.1f}%){mark}")
+        print(f"  {label}: " + ", ".join(changes))
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Concurrent-candidate load benchmark")
+    parser.add_argument("--candidates", type=int, default=20, help="concurrent candidates (default 20)")
+    parser.add_argument("--answers", type=int, default=5, help="answers submitted per candidate (default 5)")
+    parser.add_argument("--pollers", type=int, default=2, help="parallel host dashboard pollers (default 2)")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="seconds between poll rounds (default 0.5)")
+    parser.add_argument("--database-url", help="database to benchmark (default: throwaway SQLite file)")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="diff the results against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="percent increase counted as a regression when comparing (default 20)")
+    args = parser.parse_args()
+
+    workdir = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        workdir = tempfile.mkdtemp(prefix="exam-benchmark-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    database_url = os.environ["DATABASE_URL"]
+
+    try:
+        results = asyncio.run(run_benchmark(args))
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "generated_at": datetime.datetime.utcnow().isoformat(),
+        "database": database_url.split("://", 1)[0],
+        "config": {
+            "candidates": args.candidates,
+            "answers": args.answers,
+            "pollers": args.pollers,
+            "poll_interval": args.poll_interval,
+        },
+        **results,
+    }
+    print_report(results)
+
+    regressions = 0
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.save}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class TTLCache:
+    """Small thread-safe LRU cache with an optional time-to-live per entry"""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one entry, or everything when no key is given"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# ---- Commit-driven invalidation ----
+# Listeners registered per table run after a commit that inserted, updated or
+# deleted rows of that table, through the ORM unit of work, a bulk query or an
+# ORM insert/update/delete statement.
+
+_table_listeners = {}
+
+
+def on_table_change(*table_names, operations=("insert", "update", "delete")):
+    """Decorator: call ``func(table_name)`` after commits that changed one of the tables.
+
+    ``operations`` narrows which kinds of change trigger the listener, e.g.
+    row counts only depend on ``("insert", "delete")``.
+    """
+    def decorator(func):
+        for table_name in table_names:
+            _table_listeners.setdefault(table_name, []).append((frozenset(operations), func))
+        return func
+    return decorator
+
+
+def _changed_tables(session):
+    return session.info.setdefault("changed_tables", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    changed = _changed_tables(session)
+    for operation, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            table = getattr(obj, "__tablename__", None)
+            if table:
+                changed.add((table, operation))
+
+
+@event.listens_for(Session, "after_bulk_update")
+def _track_bulk_update(update_context):
+    _changed_tables(update_context.session).add((update_context.mapper.local_table.name, "update"))
+
+
+@event.listens_for(Session, "after_bulk_delete")
+def _track_bulk_delete(delete_context):
+    _changed_tables(delete_context.session).add((delete_context.mapper.local_table.name, "delete"))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(orm_execute_state):
+    # session.execute(insert/update/delete(Model)) bypasses the unit of work and,
+    # in 2.x style, fires no bulk event
+    for operation, matched in (
+        ("insert", orm_execute_state.is_insert),
+        ("update", orm_execute_state.is_update),
+        ("delete", orm_execute_state.is_delete),
+    ):
+        if matched:
+            table = getattr(orm_execute_state.statement, "table", None)
+            if table is not None:
+                _changed_tables(orm_execute_state.session).add((table.name, operation))
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_commit(session):
+    changed = session.info.pop("changed_tables", None)
+    if not changed:
+        return
+    notified = set()
+    for table_name, operation in changed:
+        for operations, listener in _table_listeners.get(table_name, ()):
+            if operation not in operations or (table_name, listener) in notified:
+                continue
+            notified.add((table_name, listener))
+            try:
+                listener(table_name)
+            except Exception as e:
+                print(f"⚠️ Cache invalidation error for {table_name}: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("changed_tables", None)
@@ -1,8 +1,15 @@
 import os
-from sqlalchemy import create_engine
+import ssl
+import time
+import logging
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+logger = logging.getLogger(__name__)
+
 # Use PostgreSQL in production, SQLite locally
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./interview_program.db")
 
@@ -10,13 +17,178 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./interview_program.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL, connect_args={"check_same_thread": False}
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Engine tuning (all overridable through environment variables)
+# DB_POOL_SIZE / DB_MAX_OVERFLOW are the per-worker budget shared by the sync
+# and async engines; the async engine gets the ASYNC_* share, the sync one the rest
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 20)
+ASYNC_DB_POOL_SIZE = _env_int("ASYNC_DB_POOL_SIZE", DB_POOL_SIZE // 2)
+ASYNC_DB_MAX_OVERFLOW = _env_int("ASYNC_DB_MAX_OVERFLOW", DB_MAX_OVERFLOW // 2)
+# pool_size=0 would mean "unlimited", so each engine keeps at least one connection
+SYNC_DB_POOL_SIZE = max(DB_POOL_SIZE - ASYNC_DB_POOL_SIZE, 1)
+SYNC_DB_MAX_OVERFLOW = max(DB_MAX_OVERFLOW - ASYNC_DB_MAX_OVERFLOW, 0)
+ASYNC_DB_POOL_SIZE = max(ASYNC_DB_POOL_SIZE, 1)
+ASYNC_DB_MAX_OVERFLOW = max(ASYNC_DB_MAX_OVERFLOW, 0)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)  # seconds to wait for a free connection
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)  # seconds before a connection is replaced
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_ECHO = _env_bool("DB_ECHO", False)
+
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+
+# libpq query parameters asyncpg rejects; asyncpg_connect_args translates them
+LIBPQ_ONLY_PARAMS = ("sslmode", "sslrootcert", "sslcert", "sslkey", "application_name", "connect_timeout")
+
+
+def async_database_url(url):
+    """Same database through an asyncio driver (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith(("postgresql:", "postgresql+psycopg2:")):
+        parsed = make_url(url)
+        return parsed.set(drivername="postgresql+asyncpg").difference_update_query(
+            LIBPQ_ONLY_PARAMS
+        ).render_as_string(hide_password=False)
+    return url
+
+
+def _asyncpg_ssl(mode, rootcert, cert, key):
+    if not (rootcert or cert):
+        # asyncpg understands the libpq mode names (disable ... verify-full)
+        return mode
+    if mode == "disable":
+        return False
+    context = ssl.create_default_context(cafile=rootcert)
+    if mode != "verify-full":
+        context.check_hostname = False
+        if not rootcert:
+            context.verify_mode = ssl.CERT_NONE
+    if cert:
+        context.load_cert_chain(cert, key)
+    return context
+
+
+def asyncpg_connect_args(url):
+    """asyncpg connect() arguments for the libpq-only query parameters of ``url``"""
+    if not url.startswith(("postgresql:", "postgresql+psycopg2:")):
+        return {}
+    query = make_url(url).query
+    args = {}
+    ssl_arg = _asyncpg_ssl(query.get("sslmode"), query.get("sslrootcert"), query.get("sslcert"), query.get("sslkey"))
+    if ssl_arg is not None:
+        args["ssl"] = ssl_arg
+    if query.get("application_name"):
+        args["server_settings"] = {"application_name": query["application_name"]}
+    if query.get("connect_timeout"):
+        args["timeout"] = float(query["connect_timeout"])
+    return args
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+# Only derived URLs need the translation; an explicit ASYNC_DATABASE_URL is used as given
+ASYNC_CONNECT_ARGS = {} if os.getenv("ASYNC_DATABASE_URL") else asyncpg_connect_args(DATABASE_URL)
+
+
+def engine_options(pool_size=SYNC_DB_POOL_SIZE, max_overflow=SYNC_DB_MAX_OVERFLOW):
+    """Keyword arguments for create_engine derived from the settings above"""
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    if IS_SQLITE:
+        options["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+        if ":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") == "sqlite:":
+            # In-memory databases use a single-connection pool without sizing options
+            return options
+    options.update(
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
     )
-else:
-    engine = create_engine(DATABASE_URL)
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the single writer; busy_timeout makes writers wait instead of failing"""
+    cursor = dbapi_connection.cursor()
+    try:
+        if SQLITE_JOURNAL_MODE:
+            cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        if SQLITE_SYNCHRONOUS:
+            cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    finally:
+        cursor.close()
+
+
+def _install_listeners(sync_engine, label):
+    """Attach SQLite PRAGMAs and the pool-exhaustion warning to an engine"""
+    if IS_SQLITE:
+        event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+
+    last_warning = [0.0]
+
+    @event.listens_for(sync_engine, "checkout")
+    def _log_pool_exhaustion(dbapi_connection, connection_record, connection_proxy):
+        """Warn (at most every 10s) when every pooled connection is checked out"""
+        pool = sync_engine.pool
+        if not hasattr(pool, "size") or not hasattr(pool, "checkedout"):
+            return
+        capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+        if pool.checkedout() >= capacity:
+            now = time.monotonic()
+            if now - last_warning[0] >= 10:
+                last_warning[0] = now
+                logger.warning(
+                    "Database pool exhausted (%s engine): %s/%s connections in use; new requests wait up to %ss",
+                    label, pool.checkedout(), capacity, DB_POOL_TIMEOUT
+                )
+
+
+engine = create_engine(DATABASE_URL, **engine_options())
+_install_listeners(engine, "sync")
+
+# Async engine for the candidate hot endpoints; its own pool, sized from the async share
+_async_options = engine_options(ASYNC_DB_POOL_SIZE, ASYNC_DB_MAX_OVERFLOW)
+if ASYNC_CONNECT_ARGS:
+    _async_options["connect_args"] = ASYNC_CONNECT_ARGS
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_async_options)
+_install_listeners(async_engine.sync_engine, "async")
+
+
+def pool_status(engine=engine):
+    """Current pool usage, for diagnostics"""
+    pool = engine.pool
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size() if hasattr(pool, "size") else None,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+        "max_overflow": getattr(pool, "_max_overflow", None),
+        "timeout": DB_POOL_TIMEOUT,
+    }
+
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
-Base = declarative_base() 
\ No newline at end of file
+Base = declarative_base()
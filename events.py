@@ -0,0 +1,100 @@
+import asyncio
+import datetime
+import itertools
+import json
+import threading
+
+
+class Subscription:
+    """One SSE client: a bounded queue fed from any thread onto the client's event loop"""
+
+    def __init__(self, exam_id, loop, queue_size):
+        self.exam_id = exam_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def push(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Event loop already closed; the stream is going away
+            pass
+
+    def _put(self, event):
+        # A slow client loses its oldest events instead of blocking publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class EventBroker:
+    """In-process publisher that fans exam events out to SSE subscribers.
+
+    Subscribers listen to one exam, or to every exam with ``exam_id=None``.
+    ``publish`` is safe to call from sync endpoints running in the threadpool.
+    """
+
+    def __init__(self, queue_size=256, heartbeat_seconds=15):
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, exam_id=None):
+        subscription = Subscription(exam_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(exam_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.exam_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.exam_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, event_type, exam_id=None, **data):
+        """Send an event to the exam's subscribers and to the all-exams subscribers"""
+        with self._lock:
+            if not self._subscribers:
+                return
+            targets = list(self._subscribers.get(None, ()))
+            if exam_id is not None:
+                targets += self._subscribers.get(exam_id, ())
+        event = {
+            "id": next(self._ids),
+            "type": event_type,
+            "exam_id": exam_id,
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "data": data,
+        }
+        for subscription in targets:
+            subscription.push(event)
+
+    async def stream(self, request, exam_id=None):
+        """Async generator of SSE frames for one client, with keep-alive comments"""
+        subscription = self.subscribe(exam_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+
+broker = EventBroker()
@@ -0,0 +1,145 @@
+"""Per-exam attempt counters (the ``exam_stats`` rollup).
+
+Every write that starts an attempt, ends one or stores strike violations also
+adds its deltas to the exam's ``exam_stats`` row, in the same transaction, so
+the stats endpoints read one row instead of scanning the attempts:
+
+    participants  attempts started
+    active        attempts without an end_time
+    completed     attempts with an end_time
+    violations    sum of alt_tab_count
+
+``repair`` recomputes every row from ``exam_attempts`` and reports drift.
+
+Usage:
+    python exam_stats.py repair
+"""
+import datetime
+
+from sqlalchemy import case, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import models
+
+COUNTERS = ("participants", "active", "completed", "violations")
+
+_dialect_inserts = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _key(exam_id):
+    return exam_id or 0
+
+
+def change_statement(dialect_name, exam_id, **deltas):
+    """INSERT ... ON CONFLICT DO UPDATE adding ``deltas`` to the exam's counters"""
+    table = models.ExamStat.__table__
+    values = {name: deltas.get(name, 0) for name in COUNTERS}
+    statement = _dialect_inserts[dialect_name](table).values(
+        exam_session_id=_key(exam_id), updated_at=datetime.datetime.utcnow(), **values
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.exam_session_id],
+        set_={
+            **{name: func.coalesce(table.c[name], 0) + statement.excluded[name] for name in values if values[name]},
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+
+
+def record(db: Session, exam_id, **deltas):
+    """Add counter deltas as part of the caller's (sync) transaction"""
+    db.execute(change_statement(db.get_bind().dialect.name, exam_id, **deltas))
+
+
+async def record_async(db, exam_id, **deltas):
+    """Same as record, for an AsyncSession"""
+    await db.execute(change_statement(db.get_bind().dialect.name, exam_id, **deltas))
+
+
+def reassign(db: Session, exam_id, new_exam_id=None):
+    """Move the exam's counters onto ``new_exam_id`` (key 0 by default) and drop its row.
+
+    For when the exam's attempts are moved or detached in the same transaction
+    (deleting an exam leaves its attempts without one).
+    """
+    if _key(exam_id) == _key(new_exam_id):
+        return
+    row = db.query(models.ExamStat).filter(
+        models.ExamStat.exam_session_id == _key(exam_id)
+    ).with_for_update().first()
+    if row is None:
+        return
+    record(db, new_exam_id, **{name: getattr(row, name) or 0 for name in COUNTERS})
+    db.delete(row)
+
+
+def read(db: Session, exam_id):
+    """The exam's counters as a dict (zeros when it has no attempts yet)"""
+    row = db.query(*(models.ExamStat.__table__.c[name] for name in COUNTERS)).filter(
+        models.ExamStat.exam_session_id == _key(exam_id)
+    ).first()
+    return dict(zip(COUNTERS, row)) if row else dict.fromkeys(COUNTERS, 0)
+
+
+def totals(db: Session):
+    """Counters summed over all exams (one small aggregate over the rollup rows)"""
+    row = db.query(*(func.coalesce(func.sum(models.ExamStat.__table__.c[name]), 0) for name in COUNTERS)).one()
+    return dict(zip(COUNTERS, (int(value) for value in row)))
+
+
+def repair(db: Session):
+    """Recompute every row from exam_attempts; returns the rows that had drifted.
+
+    Meant for quiet moments (startup, the CLI): a write committed between
+    the grouped read and the rewrite is lost until the next repair.
+    """
+    attempt = models.ExamAttempt
+    expected = {}
+    for row in db.query(
+        attempt.exam_session_id,
+        func.count(attempt.id),
+        func.sum(case((attempt.end_time.is_(None), 1), else_=0)),
+        func.sum(case((attempt.end_time.isnot(None), 1), else_=0)),
+        func.sum(func.coalesce(attempt.alt_tab_count, 0)),
+    ).group_by(attempt.exam_session_id):
+        # Attempts without an exam (NULL) share key 0
+        counters = expected.setdefault(_key(row[0]), dict.fromkeys(COUNTERS, 0))
+        for name, value in zip(COUNTERS, row[1:]):
+            counters[name] += int(value or 0)
+    stored = {
+        row.exam_session_id: {name: getattr(row, name) or 0 for name in COUNTERS}
+        for row in db.query(models.ExamStat)
+    }
+    drift = [
+        {"exam_id": exam_id, "stored": stored.get(exam_id), "expected": counters}
+        for exam_id, counters in expected.items() if stored.get(exam_id) != counters
+    ] + [
+        {"exam_id": exam_id, "stored": counters, "expected": None}
+        for exam_id, counters in stored.items() if exam_id not in expected
+    ]
+    if drift:
+        now = datetime.datetime.utcnow()
+        db.query(models.ExamStat).delete(synchronize_session=False)
+        if expected:
+            db.execute(insert(models.ExamStat), [
+                {"exam_session_id": exam_id, "updated_at": now, **counters}
+                for exam_id, counters in expected.items()
+            ])
+    db.commit()
+    return drift
+
+
+if __name__ == "__main__":
+    import sys
+
+    from database import SessionLocal
+
+    if sys.argv[1:] != ["repair"]:
+        print("usage: python exam_stats.py repair")
+        sys.exit(2)
+    with SessionLocal() as db:
+        drift = repair(db)
+    for item in drift:
+        print(f"exam {item['exam_id']}: stored {item['stored']} -> {item['expected']}")
+    print(f"✅ exam_stats repaired ({len(drift)} rows changed)")
@@ -0,0 +1,114 @@
+"""Streaming CSV / NDJSON exports of exam attempts and answers.
+
+Rows are read through ``yield_per`` (a server-side cursor on PostgreSQL) and
+written out in chunks, so memory stays flat however many attempts an exam has.
+Each generator opens its own session because the response body is produced
+after the request's dependencies have been torn down.
+"""
+import csv
+import datetime
+import io
+import json
+
+from sqlalchemy import case, select
+
+import models
+import scoring
+from database import SessionLocal
+
+EXPORT_BATCH_SIZE = 1000  # rows fetched per round trip and written per chunk
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+ATTEMPT_FIELDS = (
+    "attempt_id", "user_id", "user_name", "user_email", "status", "start_time", "end_time",
+    "duration_seconds", "score", "answers_count", "correct_answers", "points_earned",
+    "alt_tab_count",
+)
+
+ANSWER_FIELDS = (
+    "attempt_id", "user_email", "question_id", "selected_answer", "correct_answer",
+    "is_correct", "time_taken_seconds", "answered_at",
+)
+
+
+def _value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def _attempt_rows(db, exam_id):
+    attempt = models.ExamAttempt
+    statement = select(
+        attempt.id, attempt.user_id, models.User.name, models.User.email,
+        # Derived like the attempt lists do; the stored status column is never updated
+        case((attempt.end_time.isnot(None), "completed"), else_="in_progress"),
+        attempt.start_time, attempt.end_time, attempt.duration_seconds, attempt.score,
+        attempt.answers_count, attempt.correct_answers, attempt.points_earned, attempt.alt_tab_count,
+    ).outerjoin(models.User, models.User.id == attempt.user_id).where(
+        attempt.exam_session_id == exam_id
+    ).order_by(attempt.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    for row in db.execute(statement):
+        yield tuple(row)
+
+
+def _answer_rows(db, exam_id):
+    attempt = models.ExamAttempt
+    answer = models.Answer
+    statement = select(
+        answer.exam_attempt_id, models.User.email, answer.question_id, answer.selected_answer,
+        answer.correct_answer, answer.is_correct, answer.time_taken_seconds, answer.created_at,
+    ).join(attempt, attempt.id == answer.exam_attempt_id).outerjoin(
+        models.User, models.User.id == attempt.user_id
+    ).where(attempt.exam_session_id == exam_id).order_by(
+        answer.exam_attempt_id, answer.id
+    ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    for row in db.execute(statement):
+        yield tuple(row)
+
+    # Answers still held in the legacy JSON log
+    legacy = select(attempt.id, models.User.email, attempt.legacy_answered_questions).outerjoin(
+        models.User, models.User.id == attempt.user_id
+    ).where(attempt.exam_session_id == exam_id).order_by(attempt.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    for attempt_id, email, entries in db.execute(legacy):
+        for entry in scoring.legacy_entries(entries):
+            yield (
+                attempt_id, email, entry.get("question_id"), entry.get("user_answer"),
+                entry.get("correct_answer"), entry.get("is_correct"), entry.get("time_taken_seconds"),
+                entry.get("timestamp"),
+            )
+
+
+def _encode(rows, fields, file_format):
+    """Turn row tuples into byte chunks of up to EXPORT_BATCH_SIZE rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if file_format == "csv" else None
+    if writer is not None:
+        writer.writerow(fields)
+    pending = 0
+    for row in rows:
+        values = [_value(value) for value in row]
+        if writer is not None:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(fields, values)), default=str))
+            buffer.write("\n")
+        pending += 1
+        if pending >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream_export(exam_id, kind="attempts", file_format="csv"):
+    """Yield the encoded export of one exam (kind: attempts or answers)"""
+    rows, fields = (_answer_rows, ANSWER_FIELDS) if kind == "answers" else (_attempt_rows, ATTEMPT_FIELDS)
+    with SessionLocal() as db:
+        yield from _encode(rows(db, exam_id), fields, file_format)
@@ -0,0 +1,314 @@
+"""Per-question item analysis for an exam.
+
+Completed attempts are folded into ``item_stats`` once: for each question we
+keep additive sums (responses, correct, sums of the attempt total y, y^2 and
+x*y, option counts and a time histogram), computed with NumPy over the
+answers of a batch of attempts. The statistics are derived from those sums:
+
+- p-value: share of responses that were correct (difficulty)
+- point-biserial: correlation of the item with the rest of the attempt's
+  score (the item itself excluded), so short exams are not inflated
+- distractor frequencies: share of responses choosing each option
+- time quantiles: interpolated from the histogram, so approximate within a bucket
+
+Folding runs in the background (``refresh_in_background``) after attempts end
+or when a read finds work pending; reads never write. The sums are rebuilt
+from scratch when the exam's question content changes (edits, deletes), not
+when questions are only reordered.
+"""
+import datetime
+import json
+import threading
+from collections import Counter
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+import logs
+import models
+import scoring
+from database import SessionLocal
+
+log = logs.get_logger(__name__)
+
+# Attempts folded per transaction
+ITEM_ANALYSIS_BATCH = 500
+# Time-taken histogram bucket edges in seconds; the last bucket is open-ended
+TIME_BUCKETS = np.array([0, 1, 2, 3, 5, 7, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240, 300, 450, 600, 900, 1200, 1800, 3600])
+TIME_QUANTILES = (0.25, 0.5, 0.75, 0.9)
+
+
+def _pending_query(db: Session, exam_id: int):
+    attempt = models.ExamAttempt
+    return db.query(attempt.id).filter(
+        attempt.exam_session_id == exam_id,
+        attempt.end_time.isnot(None),
+        (attempt.item_stats_applied.is_(None)) | (attempt.item_stats_applied == False),  # noqa: E712
+    )
+
+
+def _pending_attempts(db: Session, exam_id: int, limit: int):
+    return [row.id for row in _pending_query(db, exam_id).order_by(models.ExamAttempt.id).limit(limit)]
+
+
+def _load_answers(db: Session, attempt_ids):
+    """(attempt_id, question_id, selected answer, is_correct, time taken) for the attempts"""
+    answer = models.Answer
+    # Answers detached from a deleted question (question_id NULL) are left out
+    rows = db.query(
+        answer.exam_attempt_id, answer.question_id, answer.selected_answer,
+        answer.is_correct, answer.time_taken_seconds,
+    ).filter(answer.exam_attempt_id.in_(attempt_ids), answer.question_id.isnot(None)).all()
+    legacy = db.query(models.ExamAttempt.id, models.ExamAttempt.legacy_answered_questions).filter(
+        models.ExamAttempt.id.in_(attempt_ids)
+    )
+    for attempt_id, entries in legacy:
+        for entry in scoring.legacy_entries(entries):
+            if entry.get("question_id") is not None:
+                rows.append((
+                    attempt_id, entry["question_id"], entry.get("user_answer"),
+                    entry.get("is_correct"), entry.get("time_taken_seconds"),
+                ))
+    return rows
+
+
+def _fold(rows):
+    """Vectorized per-question sums for one batch of answers, keyed by question_id"""
+    attempt_ids = np.array([row[0] for row in rows])
+    question_ids = np.array([row[1] for row in rows])
+    correct = np.array([1.0 if row[3] else 0.0 for row in rows])
+    times = np.array([np.nan if row[4] is None else float(row[4]) for row in rows])
+
+    # Attempt total = correct answers in the attempt, broadcast back to each answer
+    _, attempt_index = np.unique(attempt_ids, return_inverse=True)
+    totals = np.bincount(attempt_index, weights=correct)[attempt_index]
+
+    questions, index = np.unique(question_ids, return_inverse=True)
+    size = len(questions)
+    responses = np.bincount(index, minlength=size)
+    sums = {
+        "correct": np.bincount(index, weights=correct, minlength=size),
+        "sum_total": np.bincount(index, weights=totals, minlength=size),
+        "sum_total_sq": np.bincount(index, weights=totals * totals, minlength=size),
+        "sum_correct_total": np.bincount(index, weights=correct * totals, minlength=size),
+    }
+
+    timed = ~np.isnan(times)
+    buckets = np.searchsorted(TIME_BUCKETS, times[timed], side="right") - 1
+    histogram = np.bincount(
+        index[timed] * len(TIME_BUCKETS) + np.clip(buckets, 0, len(TIME_BUCKETS) - 1),
+        minlength=size * len(TIME_BUCKETS),
+    ).reshape(size, len(TIME_BUCKETS))
+    time_count = np.bincount(index[timed], minlength=size)
+    time_sum = np.bincount(index[timed], weights=times[timed], minlength=size)
+
+    options = Counter((row[1], row[2]) for row in rows if row[2] is not None)
+
+    folded = {}
+    for position, question_id in enumerate(questions.tolist()):
+        folded[question_id] = {
+            "responses": int(responses[position]),
+            "correct": int(sums["correct"][position]),
+            "sum_total": float(sums["sum_total"][position]),
+            "sum_total_sq": float(sums["sum_total_sq"][position]),
+            "sum_correct_total": float(sums["sum_correct_total"][position]),
+            "time_count": int(time_count[position]),
+            "time_sum": float(time_sum[position]),
+            "time_histogram": histogram[position].tolist(),
+            "option_counts": {},
+        }
+    for (question_id, option), count in options.items():
+        folded[question_id]["option_counts"][str(option)] = count
+    return folded
+
+
+def _merge(db: Session, exam_id: int, content_version: int, folded):
+    existing = {
+        stat.question_id: stat for stat in db.query(models.ItemStat).filter(
+            models.ItemStat.exam_session_id == exam_id,
+            models.ItemStat.question_id.in_(list(folded)),
+        )
+    }
+    now = datetime.datetime.utcnow()
+    for question_id, sums in folded.items():
+        stat = existing.get(question_id)
+        if stat is None:
+            stat = models.ItemStat(
+                exam_session_id=exam_id, question_id=question_id, questions_version=content_version,
+                responses=0, correct=0, sum_total=0, sum_total_sq=0, sum_correct_total=0,
+                option_counts={}, time_count=0, time_sum=0, time_histogram=[0] * len(TIME_BUCKETS),
+            )
+            db.add(stat)
+        for key in ("responses", "correct", "sum_total", "sum_total_sq", "sum_correct_total", "time_count", "time_sum"):
+            setattr(stat, key, (getattr(stat, key) or 0) + sums[key])
+        # JSON columns are replaced, not mutated, so the change is flushed
+        histogram = list(stat.time_histogram or [0] * len(TIME_BUCKETS))
+        stat.time_histogram = [a + b for a, b in zip(histogram, sums["time_histogram"])]
+        counts = dict(stat.option_counts or {})
+        for option, count in sums["option_counts"].items():
+            counts[option] = counts.get(option, 0) + count
+        stat.option_counts = counts
+        stat.updated_at = now
+
+
+def reset(db: Session, exam_id: int):
+    """Drop the exam's sums so the next refresh rebuilds them from every completed attempt"""
+    db.query(models.ItemStat).filter(models.ItemStat.exam_session_id == exam_id).delete(synchronize_session=False)
+    db.execute(
+        update(models.ExamAttempt).where(models.ExamAttempt.exam_session_id == exam_id)
+        .values(item_stats_applied=False).execution_options(synchronize_session=False)
+    )
+
+
+def is_stale(db: Session, exam_id: int, content_version: int):
+    """True when sums were built against older question content and need a rebuild"""
+    return db.query(models.ItemStat.question_id).filter(
+        models.ItemStat.exam_session_id == exam_id,
+        models.ItemStat.questions_version != content_version,
+    ).first() is not None
+
+
+def pending_count(db: Session, exam_id: int):
+    """Completed attempts not folded in yet"""
+    return _pending_query(db, exam_id).count()
+
+
+def refresh(db: Session, exam_id: int, content_version: int = 0):
+    """Fold completed attempts not yet counted into item_stats; returns how many were folded.
+
+    Each batch commits on its own. Attempts are claimed with a conditional
+    UPDATE first, so two concurrent refreshes never count an attempt twice.
+    """
+    stale = is_stale(db, exam_id, content_version)
+    if stale:
+        reset(db, exam_id)
+        db.commit()
+
+    folded_attempts = 0
+    while True:
+        attempt_ids = _pending_attempts(db, exam_id, ITEM_ANALYSIS_BATCH)
+        if not attempt_ids:
+            return folded_attempts
+        attempt = models.ExamAttempt
+        claimed = db.execute(
+            update(attempt).where(
+                attempt.id.in_(attempt_ids),
+                (attempt.item_stats_applied.is_(None)) | (attempt.item_stats_applied == False),  # noqa: E712
+            ).values(item_stats_applied=True).execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed != len(attempt_ids):
+            # Another refresh is folding these attempts; leave them to it
+            db.rollback()
+            return folded_attempts
+        rows = _load_answers(db, attempt_ids)
+        if rows:
+            _merge(db, exam_id, content_version, _fold(rows))
+        db.commit()
+        folded_attempts += len(attempt_ids)
+
+
+_refresh_lock = threading.Lock()
+_refreshing = set()  # exam IDs with a background refresh running
+_rerun = set()  # exam IDs asked to refresh again while one was running
+
+
+def refresh_in_background(exam_id: int):
+    """Bring an exam's sums up to date in its own session (for BackgroundTasks / executors).
+
+    Calls for an exam that is already refreshing only make the running one
+    loop once more, so a burst of completed attempts costs one or two passes.
+    """
+    with _refresh_lock:
+        if exam_id in _refreshing:
+            _rerun.add(exam_id)
+            return
+        _refreshing.add(exam_id)
+    try:
+        while True:
+            with SessionLocal() as db:
+                content_version = db.query(models.ExamSession.questions_content_version).filter(
+                    models.ExamSession.id == exam_id
+                ).scalar()
+                refresh(db, exam_id, content_version or 0)
+            with _refresh_lock:
+                if exam_id not in _rerun:
+                    _refreshing.discard(exam_id)
+                    return
+                _rerun.discard(exam_id)
+    except Exception:
+        log.exception("Item analysis refresh failed", exam_id=exam_id)
+        with _refresh_lock:
+            _refreshing.discard(exam_id)
+            _rerun.discard(exam_id)
+
+
+def _quantiles(histogram, count):
+    """Quantiles interpolated linearly inside the histogram buckets"""
+    if not count:
+        return {f"p{int(q * 100)}": None for q in TIME_QUANTILES}
+    cumulative = np.cumsum(histogram)
+    upper_edges = np.append(TIME_BUCKETS[1:], TIME_BUCKETS[-1])
+    result = {}
+    for q in TIME_QUANTILES:
+        target = q * count
+        bucket = int(np.searchsorted(cumulative, target, side="left"))
+        before = cumulative[bucket - 1] if bucket > 0 else 0
+        inside = histogram[bucket] or 1
+        fraction = min(max((target - before) / inside, 0.0), 1.0)
+        low, high = TIME_BUCKETS[bucket], upper_edges[bucket]
+        result[f"p{int(q * 100)}"] = round(float(low + (high - low) * fraction), 2)
+    return result
+
+
+def summarize(stats, questions):
+    """Statistics per question from ItemStat rows; ``questions`` maps id -> Question"""
+    if not stats:
+        return []
+    n = np.array([stat.responses or 0 for stat in stats], dtype=float)
+    x = np.array([stat.correct or 0 for stat in stats], dtype=float)
+    y = np.array([stat.sum_total or 0 for stat in stats], dtype=float)
+    yy = np.array([stat.sum_total_sq or 0 for stat in stats], dtype=float)
+    xy = np.array([stat.sum_correct_total or 0 for stat in stats], dtype=float)
+
+    # Rest score r = y - x (x is 0/1 so x^2 = x)
+    r = y - x
+    rr = yy - 2 * xy + x
+    xr = xy - x
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_values = np.where(n > 0, x / n, np.nan)
+        covariance = n * xr - x * r
+        spread = np.sqrt((n * x - x * x) * (n * rr - r * r))
+        point_biserial = np.where(spread > 0, covariance / spread, np.nan)
+
+    result = []
+    for position, stat in enumerate(stats):
+        question = questions.get(stat.question_id)
+        try:
+            options = json.loads(question.options) if question and isinstance(question.options, str) else (question.options if question else [])
+        except ValueError:
+            options = []
+        counts = dict(stat.option_counts or {})
+        responses = int(n[position])
+        names = list(options or []) + [option for option in counts if option not in (options or [])]
+        result.append({
+            "question_id": stat.question_id,
+            "text": question.text if question else None,
+            "order_index": question.order_index if question else None,
+            "responses": responses,
+            "p_value": None if np.isnan(p_values[position]) else round(float(p_values[position]), 4),
+            "point_biserial": None if np.isnan(point_biserial[position]) else round(float(point_biserial[position]), 4),
+            "distractors": [
+                {
+                    "option": option,
+                    "count": counts.get(option, 0),
+                    "frequency": round(counts.get(option, 0) / responses, 4) if responses else None,
+                    "is_correct": bool(question) and option == question.correct_answer,
+                }
+                for option in names
+            ],
+            "mean_time_seconds": round(stat.time_sum / stat.time_count, 2) if stat.time_count else None,
+            "time_quantiles": _quantiles(np.array(stat.time_histogram or [0] * len(TIME_BUCKETS)), stat.time_count or 0),
+        })
+    result.sort(key=lambda item: (item["order_index"] is None, item["order_index"] or 0, item["question_id"]))
+    return result
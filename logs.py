@@ -0,0 +1,166 @@
+"""Structured, non-blocking logging.
+
+Records are handed to a queue on the calling thread and written to stdout by
+a background listener, so request handlers never wait on terminal I/O.
+
+    log = logs.get_logger(__name__)
+    log.info("Exam attempt created", attempt_id=7, exam_id=3)
+
+Settings (environment variables):
+    LOG_LEVEL=INFO                       root level
+    LOG_LEVELS=main=DEBUG,database=WARNING   per-module levels
+    LOG_FORMAT=text|json                 output format
+    LOG_SAMPLE=native_violation=10       keep 1 in N records of a sampled event
+"""
+import atexit
+import contextvars
+import datetime
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+
+# ID of the HTTP request being served, attached to every record logged while handling it
+request_id = contextvars.ContextVar("request_id", default=None)
+
+_listener = None
+
+
+def _parse_pairs(value):
+    pairs = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            key, _, setting = item.partition("=")
+            pairs[key.strip()] = setting.strip()
+    return pairs
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one record in N for events tagged with ``sample="<event>"``"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = {event: max(int(rate), 1) for event, rate in rates.items()}
+        self._counters = {event: itertools.count() for event in self.rates}
+
+    def filter(self, record):
+        event = getattr(record, "sample", None)
+        counter = self._counters.get(event)
+        if counter is None:
+            return True
+        return next(counter) % self.rates[event] == 0
+
+
+class ContextFilter(logging.Filter):
+    """Stamp the current request ID on the record before it leaves the request's context"""
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id.get()
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    def __init__(self, as_json=False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = dict(getattr(record, "fields", None) or {})
+        if getattr(record, "request_id", None):
+            fields["request_id"] = record.request_id
+        timestamp = datetime.datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds")
+        message = record.getMessage()
+        if self.as_json:
+            entry = {"ts": timestamp, "level": record.levelname, "logger": record.name, "message": message, **fields}
+            if record.exc_info:
+                entry["exc_info"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+        line = f"{timestamp} {record.levelname:<7} {record.name}: {message}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger taking keyword fields: ``log.info("msg", attempt_id=1, sample="event")``"""
+
+    def process(self, msg, kwargs):
+        extra = {}
+        fields = {}
+        for key in list(kwargs):
+            if key in ("exc_info", "stack_info", "stacklevel"):
+                continue
+            value = kwargs.pop(key)
+            if key == "sample":
+                extra["sample"] = value
+            else:
+                fields[key] = value
+        extra["fields"] = fields
+        kwargs["extra"] = extra
+        return msg, kwargs
+
+
+def get_logger(name):
+    return StructuredLogger(logging.getLogger(name), {})
+
+
+def configure_logging():
+    """Route all logging through a queue to a background stdout writer (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    for name, level in _parse_pairs(os.getenv("LOG_LEVELS")).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(StructuredFormatter(as_json=os.getenv("LOG_FORMAT", "text").lower() == "json"))
+
+    log_queue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(_parse_pairs(os.getenv("LOG_SAMPLE"))))
+    handler.addFilter(ContextFilter())
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class RequestIdMiddleware:
+    """Pure ASGI middleware: reuse the X-Request-ID header (or create one) and echo it back"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        value = None
+        for name, header in scope.get("headers", ()):
+            if name == b"x-request-id":
+                value = header.decode("latin-1")[:64]
+                break
+        value = value or uuid.uuid4().hex[:12]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", value.encode("latin-1"))]
+            await send(message)
+
+        token = request_id.set(value)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
@@ -1,28 +1,48 @@
-from fastapi import FastAPI, Depends, HTTPException, Form, Request
+import time
+BOOT_STARTED = time.perf_counter()  # reported as part of the startup time
+
+from fastapi import FastAPI, Depends, HTTPException, Form, Request, UploadFile, File, Body, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from sqlalchemy import text
-import random
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, insert
+from sqlalchemy.exc import IntegrityError
+import csv
 import datetime
+import io
 import json
-from typing import List
+import hashlib
+from typing import List, Optional
 
 import models
 import schemas
-from database import SessionLocal, engine
-from auth import get_password_hash, verify_password, create_access_token, get_current_user, get_current_host, get_current_participant
+import scoring
+import queries
+import cache
+import sampling
+import events
+import exam_stats
+import exports
+import item_analysis
+import migrations
+import ordering
+import metrics
+import logs
+import passwords
+import violations
+from database import SessionLocal, AsyncSessionLocal, engine, async_engine
+from auth import create_access_token, get_current_user, get_current_host, get_current_host_for_stream, get_current_participant, UserSnapshot
 import os
-from pynput import keyboard
 import threading
-import time
-import requests
 import re
+from collections import OrderedDict, deque
+from itertools import islice
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+logs.configure_logging()
+log = logs.get_logger(__name__)
 
 app = FastAPI(
     title="Professional Exam System",
@@ -32,66 +52,80 @@ app = FastAPI(
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Global variables for native monitoring
-native_monitor_active = False
-native_monitor_listener = None
-native_monitor_thread = None
-current_exam_attempt_id = None
-native_violations = []
+# Per-route latency / size / SQL metrics, exposed on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(logs.RequestIdMiddleware)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+for _name, _kind, _help, _key in (
+    ("password_pool_pending", "gauge", "bcrypt hash/verify calls queued or running.", "pending"),
+    ("password_pool_rejected_total", "counter", "bcrypt calls rejected because the queue was full.", "rejected"),
+    ("password_pool_completed_total", "counter", "bcrypt calls completed.", "completed"),
+    ("password_pool_wait_seconds_total", "counter", "Time bcrypt calls spent queued for a worker.", "wait_seconds"),
+    ("password_pool_run_seconds_total", "counter", "Time spent hashing in the workers.", "run_seconds"),
+):
+    metrics.registry.register_collector(_name, _kind, _help, lambda key=_key: passwords.pool.stats()[key])
+metrics.registry.register_collector(
+    "app_startup_seconds", "gauge", "Time from importing main to the end of startup.",
+    lambda: startup_timings.get("total_seconds", 0)
+)
 
-# --- Lightweight SQLite migrations ---
-def run_sqlite_migrations():
-    try:
-        with engine.begin() as connection:
-            def table_has_column(table_name: str, column_name: str) -> bool:
-                rows = connection.execute(text(f"PRAGMA table_info({table_name})")).fetchall()
-                for row in rows:
-                    try:
-                        # SQLite returns: cid, name, type, notnull, dflt_value, pk
-                        if row[1] == column_name or getattr(row, "name", None) == column_name:
-                            return True
-                    except Exception:
-                        pass
-                return False
-
-            # exam_sessions: add start_date, end_date
-            if not table_has_column("exam_sessions", "start_date"):
-                connection.execute(text("ALTER TABLE exam_sessions ADD COLUMN start_date DATETIME"))
-            if not table_has_column("exam_sessions", "end_date"):
-                connection.execute(text("ALTER TABLE exam_sessions ADD COLUMN end_date DATETIME"))
-
-            # exam_attempts: add alt_tab_count, answered_questions, duration_seconds, average_time_per_question_seconds
-            if not table_has_column("exam_attempts", "alt_tab_count"):
-                connection.execute(text("ALTER TABLE exam_attempts ADD COLUMN alt_tab_count INTEGER DEFAULT 0"))
-                connection.execute(text("UPDATE exam_attempts SET alt_tab_count = 0 WHERE alt_tab_count IS NULL"))
-            if not table_has_column("exam_attempts", "answered_questions"):
-                connection.execute(text("ALTER TABLE exam_attempts ADD COLUMN answered_questions TEXT"))
-                connection.execute(text("UPDATE exam_attempts SET answered_questions = '[]' WHERE answered_questions IS NULL"))
-            if not table_has_column("exam_attempts", "duration_seconds"):
-                connection.execute(text("ALTER TABLE exam_attempts ADD COLUMN duration_seconds INTEGER"))
-            if not table_has_column("exam_attempts", "average_time_per_question_seconds"):
-                connection.execute(text("ALTER TABLE exam_attempts ADD COLUMN average_time_per_question_seconds FLOAT"))
-            # questions: add order_index
-            try:
-                rows = connection.execute(text("PRAGMA table_info(questions)")).fetchall()
-                has_order = any((row[1] if len(row) > 1 else getattr(row, "name", None)) == "order_index" for row in rows)
-                if not has_order:
-                    connection.execute(text("ALTER TABLE questions ADD COLUMN order_index INTEGER"))
-            except Exception:
-                pass
-    except Exception as e:
-        print(f"⚠️ Migration warning: {e}")
+# Native monitoring: recent violations kept per attempt in fixed-size ring buffers
+NATIVE_VIOLATIONS_PER_ATTEMPT = int(os.getenv("NATIVE_VIOLATIONS_PER_ATTEMPT", "100"))
+NATIVE_MONITOR_MAX_ATTEMPTS = int(os.getenv("NATIVE_MONITOR_MAX_ATTEMPTS", "1000"))
+# Server-side keyboard hooks need pynput and a display; set NATIVE_MONITORING=off on headless hosts
+NATIVE_MONITORING = os.getenv("NATIVE_MONITORING", "on").lower() not in ("0", "off", "false", "no")
+
+class AttemptMonitor:
+    """Violations seen during one attempt: the last N events plus a running total"""
+    __slots__ = ("attempt_id", "started_at", "recent", "total")
 
-# Native monitoring class
+    def __init__(self, attempt_id, capacity):
+        self.attempt_id = attempt_id
+        self.started_at = datetime.datetime.now().isoformat()
+        self.recent = deque(maxlen=capacity)
+        self.total = 0
+
+    def last(self, k):
+        return list(islice(reversed(self.recent), k))
+
+# Native monitoring registry, keyed by exam attempt
 class NativeExamMonitor:
-    def __init__(self):
-        self.violations = []
-        self.is_active = False
+    def __init__(self, capacity=NATIVE_VIOLATIONS_PER_ATTEMPT, max_attempts=NATIVE_MONITOR_MAX_ATTEMPTS):
+        self.capacity = capacity
+        self.max_attempts = max_attempts
+        self.attempts = OrderedDict()  # attempt_id -> AttemptMonitor, oldest first
+        self.recent = deque(maxlen=capacity)  # newest events across all attempts
+        self.server_total = 0  # events not tied to an attempt (server keyboard)
         self.listener = None
-        self.exam_attempt_id = None
+        self.keyboard = None  # pynput.keyboard, imported on first use; False when unavailable
+        self._lock = threading.Lock()
+
+    def load_keyboard(self):
+        """Import pynput lazily so the app starts (and runs) without it"""
+        if self.keyboard is None:
+            self.keyboard = False
+            if NATIVE_MONITORING:
+                try:
+                    from pynput import keyboard
+                    self.keyboard = keyboard
+                except Exception as e:
+                    log.warning("Native keyboard monitoring unavailable: %s", e)
+        return self.keyboard
+
+    @property
+    def is_active(self):
+        return bool(self.attempts)
+
+    @property
+    def exam_attempt_id(self):
+        """Most recently started monitored attempt"""
+        with self._lock:
+            return next(reversed(self.attempts), None)
         
     def on_press(self, key):
-        if not self.is_active:
+        keyboard = self.keyboard
+        if not self.attempts or not keyboard:
             return
             
         try:
@@ -122,43 +156,89 @@ class NativeExamMonitor:
         except AttributeError:
             pass
             
-    def record_violation(self, violation_type, description):
+    def record_violation(self, violation_type, description, attempt_id=None):
+        """Record a key event against one attempt, or once without an attempt.
+
+        The keyboard hook sees the server's own keyboard, so its events are not
+        attributed to any candidate.
+        """
         violation = {
             "timestamp": datetime.datetime.now().isoformat(),
             "type": violation_type,
             "description": description,
-            "exam_attempt_id": self.exam_attempt_id
+            "exam_attempt_id": attempt_id
         }
-        self.violations.append(violation)
-        print(f"🚨 NATIVE VIOLATION: {violation_type} - {description}")
+        with self._lock:
+            if attempt_id is None:
+                self.server_total += 1
+            elif attempt_id in self.attempts:
+                monitor = self.attempts[attempt_id]
+                monitor.recent.append(violation)
+                monitor.total += 1
+            else:
+                return
+            self.recent.append(violation)
+        # Persisted with the next violation batch; native events are not strikes
+        violations.buffer.record(attempt_id, violation_type, description, strike=False)
+        events.broker.publish("native_violation", **violation)
+        log.warning(
+            "Native violation: %s - %s", violation_type, description,
+            attempt_id=attempt_id, sample="native_violation"
+        )
         
     def start_monitoring(self, exam_attempt_id):
-        if self.is_active:
-            return
-            
-        self.exam_attempt_id = exam_attempt_id
-        self.is_active = True
-        self.violations = []
-        
-        # Start keyboard listener
-        self.listener = keyboard.Listener(on_press=self.on_press)
-        self.listener.start()
-        
-        print(f"🔍 Native monitoring started for exam attempt {exam_attempt_id}")
-        
-    def stop_monitoring(self):
-        if not self.is_active:
-            return
-            
-        self.is_active = False
-        if self.listener:
-            self.listener.stop()
-            self.listener = None
+        with self._lock:
+            if exam_attempt_id in self.attempts:
+                return
+            self.attempts[exam_attempt_id] = AttemptMonitor(exam_attempt_id, self.capacity)
+            while len(self.attempts) > self.max_attempts:
+                # Abandoned attempts never call end_exam; drop the oldest
+                self.attempts.popitem(last=False)
+            keyboard = self.load_keyboard()
+            start_listener = self.listener is None and bool(keyboard)
+            if start_listener:
+                # One keyboard listener serves every monitored attempt
+                self.listener = keyboard.Listener(on_press=self.on_press)
+        if start_listener:
+            self.listener.start()
+        
+        log.info("Native monitoring started", attempt_id=exam_attempt_id)
+        
+    def stop_monitoring(self, exam_attempt_id):
+        """Stop monitoring one attempt; returns its total violation count"""
+        with self._lock:
+            monitor = self.attempts.pop(exam_attempt_id, None)
+            listener = None
+            if not self.attempts and self.listener:
+                listener, self.listener = self.listener, None
+        if listener:
+            listener.stop()
+        if monitor is None:
+            return 0
             
-        print(f"🛑 Native monitoring stopped. Total violations: {len(self.violations)}")
-        return self.violations
-
-# Create global monitor instance
+        log.info("Native monitoring stopped", attempt_id=exam_attempt_id, violations=monitor.total)
+        return monitor.total
+
+    def active_attempts(self):
+        with self._lock:
+            return list(self.attempts)
+
+    def last(self, k, attempt_id=None):
+        """Newest k violations, for one attempt or across all attempts"""
+        with self._lock:
+            if attempt_id is None:
+                return list(islice(reversed(self.recent), k))
+            monitor = self.attempts.get(attempt_id)
+            return monitor.last(k) if monitor else []
+
+    def total(self, attempt_id=None):
+        with self._lock:
+            if attempt_id is None:
+                return self.server_total + sum(monitor.total for monitor in self.attempts.values())
+            monitor = self.attempts.get(attempt_id)
+            return monitor.total if monitor else 0
+
+# Create global monitor registry
 native_monitor = NativeExamMonitor()
 
 @app.get("/")
@@ -217,18 +297,45 @@ def get_db():
     finally:
         db.close()
 
+# Async session for the candidate hot path (exam start, questions, answers, violations, end)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def cached_json_response(request: Request, body: bytes, etag: str, cache_control: str = "no-cache"):
+    """Serve pre-serialized JSON with an ETag, answering 304 when the client copy is current"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 # Remove add_initial_questions and its call in on_startup
 # (No code here, just delete the function and the call)
 
+def attempt_already_ended():
+    return HTTPException(status_code=400, detail="Exam attempt has already ended")
+
+def password_pool_busy():
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-in requests right now, please retry in a moment",
+        headers={"Retry-After": "1"},
+    )
+
 @app.post("/register_user", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user already exists
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
+    existing_user = (await db.execute(
+        select(models.User.id).where(models.User.email == user.email)
+    )).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    # Hash password and create user
-    hashed_password = get_password_hash(user.password)
+    # Hash password (on the bcrypt worker pool) and create user
+    try:
+        hashed_password = await passwords.hash_password_async(user.password)
+    except passwords.PasswordPoolBusy:
+        raise password_pool_busy()
     db_user = models.User(
         name=user.name,
         email=user.email,
@@ -236,14 +343,20 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         role=user.role
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @app.post("/login", response_model=schemas.Token)
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == user_credentials.email).first()
-    if not user or not verify_password(user_credentials.password, user.password_hash):
+async def login(user_credentials: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(
+        select(models.User).where(models.User.email == user_credentials.email)
+    )).scalars().first()
+    try:
+        valid = bool(user) and await passwords.check_password_async(user_credentials.password, user.password_hash)
+    except passwords.PasswordPoolBusy:
+        raise password_pool_busy()
+    if not valid:
         raise HTTPException(
             status_code=401,
             detail="Incorrect email or password",
@@ -257,26 +370,22 @@ def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/me", response_model=schemas.User)
-def read_users_me(current_user: models.User = Depends(get_current_user)):
+def read_users_me(current_user: UserSnapshot = Depends(get_current_user)):
     return current_user
 
 @app.get("/get_random_questions")
-def get_random_questions(count: int = 5, db: Session = Depends(get_db)):
+def get_random_questions(count: int = 5, exam_id: int = None, attempt_id: int = None, db: Session = Depends(get_db)):
+    """Draw random questions from the whole bank or one exam; pass attempt_id for a repeatable draw"""
     try:
-        print(f"Fetching {count} random questions...")
-        
-        questions = db.query(models.Question).all()
-        print(f"Found {len(questions)} questions in database")
+        pool_size = len(sampling.eligible_question_ids(db, exam_id))
         
-        if not questions:
-            print("No questions found in database")
+        if not pool_size:
+            log.warning("No questions found in database", exam_id=exam_id)
             raise HTTPException(status_code=404, detail="No questions available in the database")
         
         # If we have fewer questions than requested, return all available questions
-        if len(questions) < count:
-            selected = questions
-        else:
-            selected = random.sample(questions, count)
+        question_ids = sampling.draw_question_ids(db, count, exam_id=exam_id, seed=attempt_id)
+        selected = sampling.fetch_questions(db, question_ids)
         
         # Serialize with options as an array
         serialized = []
@@ -295,13 +404,16 @@ def get_random_questions(count: int = 5, db: Session = Depends(get_db)):
                 "question_type": q.question_type,
                 "created_at": q.created_at.isoformat() if q.created_at else None
             })
-        print(f"Returning {len(serialized)} random questions")
+        log.debug(
+            "Returning random questions", requested=count, pool_size=pool_size,
+            returned=len(serialized), exam_id=exam_id, attempt_id=attempt_id
+        )
         return serialized
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_random_questions: {str(e)}")
+        log.exception("Error in get_random_questions", exam_id=exam_id, attempt_id=attempt_id)
         raise HTTPException(status_code=500, detail=f"Failed to fetch questions: {str(e)}")
 
 @app.post("/start_exam", response_model=schemas.ExamAttempt)
@@ -313,22 +425,21 @@ def start_exam(exam: schemas.ExamAttemptCreate, db: Session = Depends(get_db)):
         start_time=datetime.datetime.utcnow()
     )
     db.add(db_exam)
+    exam_stats.record(db, None, participants=1, active=1)
     db.commit()
     db.refresh(db_exam)
     return db_exam
 
 @app.post("/start_exam_simple")
-def start_exam_simple(
+async def start_exam_simple(
     name: str = Form(),
     email: str = Form(),
     phone: str = Form(default=""),
     exam_id: int = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Simplified exam start that creates user and exam attempt in one go, for a selected exam."""
     try:
-        print(f"Starting exam for: {name} ({email}), exam_id={exam_id}")
-        
         # Validate inputs
         if not name or not email or not exam_id:
             raise HTTPException(status_code=400, detail="Name, email, and exam_id are required")
@@ -340,7 +451,7 @@ def start_exam_simple(
             raise HTTPException(status_code=400, detail="Invalid email format")
         
         # Validate exam exists
-        exam = db.query(models.ExamSession).filter(models.ExamSession.id == exam_id).first()
+        exam = await db.get(models.ExamSession, exam_id)
         if not exam:
             raise HTTPException(status_code=404, detail="Selected exam not found")
         
@@ -366,9 +477,10 @@ def start_exam_simple(
             )
         
         # Create or get user (check for existing email)
-        user = db.query(models.User).filter(models.User.email == email).first()
+        user = (await db.execute(
+            select(models.User).where(models.User.email == email)
+        )).scalars().first()
         if not user:
-            print(f"Creating new user: {name}")
             user = models.User(
                 name=name,
                 email=email,
@@ -376,22 +488,23 @@ def start_exam_simple(
                 role="participant"
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
-            print(f"User created with ID: {user.id}")
+            await db.commit()
+            await db.refresh(user)
+            log.info("User created", user_id=user.id, exam_id=exam_id)
         else:
-            print(f"Using existing user: {user.id}")
             # Update user name if it changed
             if user.name != name:
                 user.name = name
-                db.commit()
+                await db.commit()
         
         # Check if user already has an active attempt for this exam
-        existing_attempt = db.query(models.ExamAttempt).filter(
-            models.ExamAttempt.user_id == user.id,
-            models.ExamAttempt.exam_session_id == exam_id,
-            models.ExamAttempt.end_time.is_(None)
-        ).first()
+        existing_attempt = (await db.execute(
+            select(models.ExamAttempt.id).where(
+                models.ExamAttempt.user_id == user.id,
+                models.ExamAttempt.exam_session_id == exam_id,
+                models.ExamAttempt.end_time.is_(None)
+            )
+        )).first()
         
         if existing_attempt:
             # Return existing attempt if it's still active
@@ -410,17 +523,20 @@ def start_exam_simple(
             start_time=datetime.datetime.utcnow()
         )
         db.add(exam_attempt)
-        db.commit()
-        db.refresh(exam_attempt)
+        await exam_stats.record_async(db, exam_id, participants=1, active=1)
+        await db.commit()
         
-        print(f"Exam attempt created with ID: {exam_attempt.id}")
+        log.info("Exam attempt created", attempt_id=exam_attempt.id, user_id=user.id, exam_id=exam_id)
+        events.broker.publish(
+            "attempt_started", exam_id,
+            attempt_id=exam_attempt.id, user_id=user.id, user_name=user.name
+        )
         
         # 🔍 AUTOMATICALLY START NATIVE MONITORING
         try:
             native_monitor.start_monitoring(exam_attempt.id)
-            print(f"✅ Native monitoring automatically started for exam {exam_attempt.id}")
         except Exception as monitor_error:
-            print(f"⚠️ Warning: Could not start native monitoring: {monitor_error}")
+            log.warning("Could not start native monitoring: %s", monitor_error, attempt_id=exam_attempt.id)
         
         return {
             "success": True,
@@ -431,117 +547,139 @@ def start_exam_simple(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in start_exam_simple: {str(e)}")
-        db.rollback()
+        log.exception("Error in start_exam_simple", exam_id=exam_id)
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to start exam: {str(e)}")
 
 @app.post("/submit_answer")
-def submit_answer(
+async def submit_answer(
     attempt_id: int = Form(),
     question_id: int = Form(),
     user_answer: str = Form(),
     time_taken_seconds: int = Form(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    exam_attempt = db.query(models.ExamAttempt).filter(models.ExamAttempt.id == attempt_id).first()
+    exam_attempt = (await db.execute(
+        select(models.ExamAttempt.id, models.ExamAttempt.exam_session_id, models.ExamAttempt.end_time)
+        .where(models.ExamAttempt.id == attempt_id)
+    )).first()
     if not exam_attempt:
         raise HTTPException(status_code=404, detail="Exam attempt not found")
+    if exam_attempt.end_time is not None:
+        raise attempt_already_ended()
 
-    question = db.query(models.Question).filter(models.Question.id == question_id).first()
+    question = (await db.execute(
+        select(models.Question.correct_answer, models.Question.points).where(models.Question.id == question_id)
+    )).first()
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
     is_correct = user_answer == question.correct_answer
-    
-    answered_question = {
-        "question_id": question_id,
-        "user_answer": user_answer,
+
+    # Append-only: one row per (attempt, question) instead of rewriting the JSON log
+    answer_values = {
+        "selected_answer": user_answer,
         "correct_answer": question.correct_answer,
         "is_correct": is_correct,
         "time_taken_seconds": time_taken_seconds,
     }
-
-    # Use a mutable list to ensure changes are tracked
-    current_answers = list(exam_attempt.answered_questions)
-    current_answers.append(answered_question)
-    exam_attempt.answered_questions = current_answers
-    
-    db.add(exam_attempt)
-    db.commit()
-    db.refresh(exam_attempt)
+    db.add(models.Answer(exam_attempt_id=attempt_id, question_id=question_id, **answer_values))
+    try:
+        await db.flush()
+        counted = await db.execute(scoring.answer_counter_update(attempt_id, question, is_correct, time_taken_seconds))
+    except IntegrityError:
+        # Question answered again (e.g. after navigating back): overwrite the earlier answer.
+        # The row lock makes concurrent re-answers apply their deltas one after the other.
+        await db.rollback()
+        previous = (await db.execute(
+            select(models.Answer).where(
+                models.Answer.exam_attempt_id == attempt_id,
+                models.Answer.question_id == question_id
+            ).with_for_update()
+        )).scalars().first()
+        counted = await db.execute(scoring.answer_counter_update(attempt_id, question, is_correct, time_taken_seconds, previous=previous))
+        for key, value in answer_values.items():
+            setattr(previous, key, value)
+    if counted.rowcount != 1:
+        # end_exam closed the attempt after the check above
+        await db.rollback()
+        raise attempt_already_ended()
+    await db.commit()
+    events.broker.publish(
+        "answer_submitted", exam_attempt.exam_session_id,
+        attempt_id=attempt_id, question_id=question_id, is_correct=is_correct
+    )
     return {"message": "Answer submitted successfully"}
 
 @app.post("/increment_alt_tab", response_model=dict)
-def increment_alt_tab(attempt_id: int = Form(), db: Session = Depends(get_db)):
-    exam_attempt = db.query(models.ExamAttempt).filter(models.ExamAttempt.id == attempt_id).first()
+async def increment_alt_tab(
+    attempt_id: int = Form(),
+    violation_type: str = Form(default="alt_tab"),
+    description: str = Form(default="Switched away from the exam window"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    exam_attempt = (await db.execute(
+        select(
+            models.ExamAttempt.id, models.ExamAttempt.exam_session_id,
+            models.ExamAttempt.alt_tab_count, models.ExamAttempt.end_time
+        ).where(models.ExamAttempt.id == attempt_id)
+    )).first()
     if not exam_attempt:
         raise HTTPException(status_code=404, detail="Exam attempt not found")
     
-    exam_attempt.alt_tab_count += 1
-    db.commit()
-    db.refresh(exam_attempt)
+    # Buffered: the event row and the counter update are written by the next batch flush
+    alt_tab_count = (exam_attempt.alt_tab_count or 0) + violations.buffer.record(attempt_id, violation_type, description)
+    events.broker.publish(
+        "violation", exam_attempt.exam_session_id,
+        attempt_id=attempt_id, alt_tab_count=alt_tab_count
+    )
     
     exam_ended = False
-    # If alt_tab_count reaches 3, end the exam
-    if exam_attempt.alt_tab_count >= 3 and not exam_attempt.end_time:
-        import datetime
-        exam_attempt.end_time = datetime.datetime.utcnow()
-        exam_attempt.duration_seconds = int((exam_attempt.end_time - exam_attempt.start_time).total_seconds())
-        score = 0
-        total_time = 0
-        for answer in exam_attempt.answered_questions:
-            if answer["is_correct"]:
-                score += 1
-            total_time += answer["time_taken_seconds"]
-        exam_attempt.score = score
-        if len(exam_attempt.answered_questions) > 0:
-            exam_attempt.average_time_per_question_seconds = total_time / len(exam_attempt.answered_questions)
-        else:
-            exam_attempt.average_time_per_question_seconds = 0
-        db.commit()
-        db.refresh(exam_attempt)
-        exam_ended = True
+    # If alt_tab_count reaches 3, flush now so the attempt ends without waiting for the next batch
+    if alt_tab_count >= violations.MAX_STRIKES and not exam_attempt.end_time:
+        await violations.buffer.flush()
+        # The flush (ours or one already running) ends the attempt once its strikes are stored
+        exam_ended = (await db.execute(
+            select(models.ExamAttempt.end_time).where(models.ExamAttempt.id == attempt_id)
+        )).scalar() is not None
     
     return {
-        "alt_tab_count": exam_attempt.alt_tab_count,
+        "alt_tab_count": alt_tab_count,
         "exam_ended": exam_ended
     }
 
 @app.post("/end_exam", response_model=schemas.ExamAttempt)
-def end_exam(attempt_id: int, db: Session = Depends(get_db)):
-    exam_attempt = db.query(models.ExamAttempt).filter(models.ExamAttempt.id == attempt_id).first()
+async def end_exam(attempt_id: int, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    # answers are eager-loaded: the response includes the derived answered_questions list
+    exam_attempt = (await db.execute(
+        select(models.ExamAttempt).options(selectinload(models.ExamAttempt.answers)).where(models.ExamAttempt.id == attempt_id)
+    )).scalars().first()
     if not exam_attempt:
         raise HTTPException(status_code=404, detail="Exam attempt not found")
 
-    exam_attempt.end_time = datetime.datetime.utcnow()
-    exam_attempt.duration_seconds = int((exam_attempt.end_time - exam_attempt.start_time).total_seconds())
-    
-    score = 0
-    total_time = 0
-    for answer in exam_attempt.answered_questions:
-        if answer["is_correct"]:
-            score += 1
-        total_time += answer["time_taken_seconds"]
-    
-    exam_attempt.score = score
-    if len(exam_attempt.answered_questions) > 0:
-        exam_attempt.average_time_per_question_seconds = total_time / len(exam_attempt.answered_questions)
+    end_time = datetime.datetime.utcnow()
+    closed = (await db.execute(scoring.close_attempt_statement(attempt_id, end_time))).rowcount == 1
+    if closed:
+        scoring.finalize_attempt(exam_attempt, end_time)
+        await exam_stats.record_async(db, exam_attempt.exam_session_id, active=-1, completed=1)
+        await db.commit()
+        events.broker.publish(
+            "attempt_completed", exam_attempt.exam_session_id,
+            attempt_id=exam_attempt.id, score=exam_attempt.score, terminated=False
+        )
+        if exam_attempt.exam_session_id:
+            # Fold the attempt into the item analysis after the response is sent
+            background_tasks.add_task(item_analysis.refresh_in_background, exam_attempt.exam_session_id)
     else:
-        exam_attempt.average_time_per_question_seconds = 0
-
-    db.commit()
-    db.refresh(exam_attempt)
+        # Already ended (earlier call or a violation flush): report it as stored
+        await db.refresh(exam_attempt, ["end_time", "duration_seconds", "score", "average_time_per_question_seconds", "alt_tab_count"])
     
     # 🛑 AUTOMATICALLY STOP NATIVE MONITORING
     try:
-        violations = native_monitor.stop_monitoring()
-        if violations:
-            print(f"📊 Native monitoring stopped. Found {len(violations)} violations during exam {attempt_id}")
-            # You could save these violations to the database here if needed
-        else:
-            print(f"✅ Native monitoring stopped. No violations detected during exam {attempt_id}")
+        native_violations = native_monitor.stop_monitoring(attempt_id)
+        log.info("Exam ended", attempt_id=attempt_id, score=exam_attempt.score, native_violations=native_violations)
     except Exception as monitor_error:
-        print(f"⚠️ Warning: Could not stop native monitoring: {monitor_error}")
+        log.warning("Could not stop native monitoring: %s", monitor_error, attempt_id=attempt_id)
     
     return exam_attempt
 
@@ -552,16 +690,67 @@ def get_exam_result(attempt_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Exam attempt not found")
     return exam_attempt
 
-@app.get("/get_user_results/{user_id}", response_model=List[schemas.ExamAttempt])
-def get_user_results(user_id: int, db: Session = Depends(get_db)):
-    exam_attempts = db.query(models.ExamAttempt).filter(models.ExamAttempt.user_id == user_id).all()
-    if not exam_attempts:
+def attempt_list_params(
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    sort: str = "start_time",
+    direction: str = "desc",
+    status: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    min_violations: Optional[int] = None,
+    max_violations: Optional[int] = None,
+):
+    """Query parameters shared by the paginated attempt lists"""
+    return {
+        "cursor": cursor, "limit": limit, "sort": sort, "direction": direction,
+        "filters": {
+            "status": status, "min_score": min_score, "max_score": max_score,
+            "min_violations": min_violations, "max_violations": max_violations,
+        },
+    }
+
+def attempt_list_page(db: Session, params, *filters, include_orphans=False):
+    """One page of attempts as {items, next_cursor, has_more}, without the answer log"""
+    try:
+        conditions = list(filters) + queries.attempt_filters(**params["filters"])
+        rows, next_cursor = queries.attempt_page(
+            db, *conditions, sort=params["sort"], direction=params["direction"],
+            cursor=params["cursor"], limit=params["limit"], include_orphans=include_orphans
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = [
+        {
+            "id": attempt.id,
+            "user_id": attempt.user_id,
+            "exam_session_id": attempt.exam_session_id,
+            "user_name": attempt.user_name or "Unknown User",
+            "user_email": attempt.user_email or "Unknown Email",
+            "start_time": attempt.start_time,
+            "end_time": attempt.end_time,
+            "duration_seconds": attempt.duration_seconds,
+            "alt_tab_count": attempt.alt_tab_count or 0,
+            "score": attempt.score,
+            "answers_count": attempt.answers_count or 0,
+            "total_questions": attempt.answers_count or 0,
+            "average_time_per_question_seconds": attempt.average_time_per_question_seconds,
+            "status": "completed" if attempt.end_time else "in_progress"
+        }
+        for attempt in rows
+    ]
+    return {"items": items, "next_cursor": next_cursor, "has_more": next_cursor is not None}
+
+@app.get("/get_user_results/{user_id}", response_model=schemas.AttemptPage)
+def get_user_results(user_id: int, params: dict = Depends(attempt_list_params), db: Session = Depends(get_db)):
+    page = attempt_list_page(db, params, models.ExamAttempt.user_id == user_id, include_orphans=True)
+    if not page["items"] and not params["cursor"]:
         raise HTTPException(status_code=404, detail="No exam attempts found for this user")
-    return exam_attempts
+    return page
 
-@app.get("/get_all_exam_attempts", response_model=List[schemas.ExamAttempt])
-def get_all_exam_attempts(db: Session = Depends(get_db)):
-    return db.query(models.ExamAttempt).all()
+@app.get("/get_all_exam_attempts", response_model=schemas.AttemptPage)
+def get_all_exam_attempts(params: dict = Depends(attempt_list_params), db: Session = Depends(get_db)):
+    return attempt_list_page(db, params, include_orphans=True)
 
 @app.get("/get_user/{user_id}", response_model=schemas.User)
 def get_user(user_id: int, db: Session = Depends(get_db)):
@@ -587,6 +776,12 @@ def get_question(question_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Question not found")
     return question
 
+def question_error(options_list, correct_answer):
+    """Validation shared by create_question and the bulk import; returns an error message or None"""
+    if correct_answer not in options_list:
+        return "Correct answer must be one of the options"
+    return None
+
 @app.post("/api/create_question", response_model=schemas.Question)
 def create_question(
     text: str = Form(),
@@ -599,13 +794,13 @@ def create_question(
     """Create a new question"""
     try:
         options_list = json.loads(options)
-        if correct_answer not in options_list:
-            raise HTTPException(status_code=400, detail="Correct answer must be one of the options")
+        error = question_error(options_list, correct_answer)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
         # Determine order_index within exam if provided
         order_index = None
         if exam_id:
-            max_order = db.query(models.Question).filter(models.Question.exam_session_id == exam_id).with_entities(func.max(models.Question.order_index)).scalar()
-            order_index = (max_order or 0) + 1
+            order_index = ordering.next_order_key(db, exam_id)
         question = models.Question(
             text=text,
             options=json.dumps(options_list),
@@ -615,6 +810,8 @@ def create_question(
             order_index=order_index,
         )
         db.add(question)
+        if exam_id:
+            bump_questions_version(db, exam_id)
         db.commit()
         db.refresh(question)
         return question
@@ -624,14 +821,157 @@ def create_question(
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+# ---- Bulk question import ----
+
+QUESTION_IMPORT_BATCH_SIZE = 1000
+QUESTION_IMPORT_MAX_ERRORS = 100  # errors listed in the response; the count covers all of them
+
+def parse_import_options(value):
+    """Options cell: a JSON array, or values separated by '|'"""
+    if isinstance(value, list):
+        return [str(option) for option in value]
+    value = (value or "").strip()
+    if value.startswith("["):
+        return [str(option) for option in json.loads(value)]
+    return [option.strip() for option in value.split("|") if option.strip()]
+
+def iter_import_rows(upload: UploadFile, file_format: str):
+    """Yield (row_number, dict) from a CSV or JSONL upload without reading it into memory"""
+    stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Options may also come as option_1, option_2, ... columns
+            if not row.get("options"):
+                numbered = sorted(
+                    (key for key in row if key and key.lower().startswith("option_")),
+                    key=lambda key: int(key.split("_", 1)[1]) if key.split("_", 1)[1].isdigit() else 0
+                )
+                row["options"] = [row[key] for key in numbered if row[key]]
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                yield line_number, None
+                continue
+            yield line_number, row if isinstance(row, dict) else None
+
+@app.post("/api/exam/{exam_id}/import_questions")
+def import_questions(
+    exam_id: int,
+    file: UploadFile = File(...),
+    file_format: str = Form(default=None),
+    dry_run: bool = Form(default=False),
+    db: Session = Depends(get_db)
+):
+    """Bulk-create questions from a CSV or JSONL file.
+
+    Rows are validated like create_question; valid rows get consecutive
+    order keys after the exam's current last question and are
+    inserted in batches within one transaction. Invalid rows are skipped
+    and reported by row number.
+    """
+    exam = db.query(models.ExamSession.id).filter(models.ExamSession.id == exam_id).first()
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+
+    file_format = (file_format or "").lower()
+    if not file_format:
+        name = (file.filename or "").lower()
+        file_format = "jsonl" if name.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+    if file_format not in ("csv", "jsonl"):
+        raise HTTPException(status_code=400, detail="file_format must be csv or jsonl")
+
+    next_order = first_order = ordering.next_order_key(db, exam_id)
+    imported = 0
+    errors = []
+    error_count = 0
+    batch = []
+    now = datetime.datetime.utcnow()
+
+    try:
+        for row_number, row in iter_import_rows(file, file_format):
+            error = None
+            if row is None:
+                error = "Invalid JSON object"
+            else:
+                text = str(row.get("text") or row.get("question") or "").strip()
+                correct_answer = str(row.get("correct_answer") or "").strip()
+                try:
+                    options_list = parse_import_options(row.get("options"))
+                    points = row.get("points")
+                    # Only a missing value defaults to 1; 0 is a valid weight
+                    points = 1 if points is None or points == "" else int(points)
+                except (ValueError, TypeError):
+                    error = "Invalid options or points"
+                else:
+                    # Blank CSV lines have no text; the form endpoint requires it anyway
+                    error = "Question text is required" if not text else question_error(options_list, correct_answer)
+            if error:
+                error_count += 1
+                if len(errors) < QUESTION_IMPORT_MAX_ERRORS:
+                    errors.append({"row": row_number, "error": error})
+                continue
+
+            batch.append({
+                "text": text,
+                "options": json.dumps(options_list),
+                "correct_answer": correct_answer,
+                "points": points,
+                "question_type": row.get("question_type") or "multiple_choice",
+                "exam_session_id": exam_id,
+                "order_index": next_order,
+                "created_at": now,
+            })
+            next_order += ordering.ORDER_GAP
+            if len(batch) >= QUESTION_IMPORT_BATCH_SIZE:
+                if not dry_run:
+                    db.execute(insert(models.Question), batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            if not dry_run:
+                db.execute(insert(models.Question), batch)
+            imported += len(batch)
+
+        if dry_run:
+            db.rollback()
+        elif imported:
+            bump_questions_version(db, exam_id)
+            db.commit()
+    except UnicodeDecodeError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    except csv.Error as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to import questions: {str(e)}")
+
+    return {
+        "success": True,
+        "dry_run": dry_run,
+        "imported": imported,
+        "failed": error_count,
+        "first_order_index": first_order if imported else None,
+        "last_order_index": next_order - ordering.ORDER_GAP if imported else None,
+        "errors": errors,
+    }
+
 @app.put("/api/question/{question_id}")
 async def update_question(question_id: int, request: Request, db: Session = Depends(get_db)):
-    """Update question text/options/correct_answer/points"""
+    """Update question text/options/correct_answer/points, or move it to another exam (exam_id)"""
     try:
         body = await request.json()
         q = db.query(models.Question).filter(models.Question.id == question_id).first()
         if not q:
             raise HTTPException(status_code=404, detail="Question not found")
+        previous_exam_id = q.exam_session_id
         if "text" in body:
             q.text = body["text"]
         if "options" in body:
@@ -645,6 +985,16 @@ async def update_question(question_id: int, request: Request, db: Session = Depe
             q.correct_answer = body["correct_answer"]
         if "points" in body:
             q.points = int(body["points"])
+        if "exam_id" in body and body["exam_id"] != previous_exam_id:
+            if body["exam_id"] is not None and not db.query(models.ExamSession.id).filter(
+                models.ExamSession.id == body["exam_id"]
+            ).first():
+                raise HTTPException(status_code=404, detail="Exam not found")
+            q.exam_session_id = body["exam_id"]
+            q.order_index = ordering.next_order_key(db, body["exam_id"]) if body["exam_id"] is not None else None
+        # Both exams' cached payloads change when the question moves
+        for exam_id in {previous_exam_id, q.exam_session_id} - {None}:
+            bump_questions_version(db, exam_id, content=True)
         db.commit()
         db.refresh(q)
         return {"success": True}
@@ -667,39 +1017,133 @@ async def reorder_questions(exam_id: int, request: Request, db: Session = Depend
     if not set(order).issubset(qids):
         raise HTTPException(status_code=400, detail="Order contains invalid question IDs for this exam")
     try:
-        for idx, qid in enumerate(order, start=1):
-            db.query(models.Question).filter(models.Question.id == qid).update({models.Question.order_index: idx})
+        ordering.set_order(db, order)
+        bump_questions_version(db, exam_id)
         db.commit()
         return {"success": True}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-# Improve /api/exam/{exam_id}/questions to return ordered list with index
+@app.post("/api/exam/{exam_id}/move_questions")
+def move_questions(exam_id: int, data: dict = Body(...), db: Session = Depends(get_db)):
+    """Move questions relative to others: {"moves": [{"question_id", "after_id" | "before_id"}]}.
+
+    Each move rewrites only the moved question's order key; omit both
+    after_id and before_id to move a question to the end.
+    """
+    moves = data.get("moves", [])
+    if not isinstance(moves, list) or not moves:
+        raise HTTPException(status_code=400, detail="Moves must be a non-empty array")
+    qids = {row.id for row in db.query(models.Question.id).filter(models.Question.exam_session_id == exam_id)}
+    for move in moves:
+        if not isinstance(move, dict):
+            raise HTTPException(status_code=400, detail="Each move must be an object")
+        referenced = [move.get(key) for key in ("question_id", "after_id", "before_id") if move.get(key) is not None]
+        if move.get("question_id") not in qids or not set(referenced).issubset(qids):
+            raise HTTPException(status_code=400, detail="Moves contain invalid question IDs for this exam")
+        if move.get("question_id") in (move.get("after_id"), move.get("before_id")):
+            raise HTTPException(status_code=400, detail="A question cannot be moved relative to itself")
+    try:
+        keys = {}
+        for move in moves:
+            keys[move["question_id"]] = ordering.move_question(
+                db, exam_id, move["question_id"], after_id=move.get("after_id"), before_id=move.get("before_id")
+            )
+        bump_questions_version(db, exam_id)
+        db.commit()
+        return {"success": True, "order_index": keys}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/exam/{exam_id}/rebalance_order")
+def rebalance_question_order(exam_id: int, db: Session = Depends(get_db)):
+    """Re-space the exam's order keys evenly (moves do this on their own when keys run out)"""
+    try:
+        count = ordering.rebalance(db, exam_id)
+        bump_questions_version(db, exam_id)
+        db.commit()
+        return {"success": True, "questions": count}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+def bump_questions_version(db: Session, exam_id: int, content: bool = False):
+    """Mark the exam's question payload as changed (part of the caller's transaction).
+
+    ``content`` also bumps questions_content_version, for edits and deletes
+    that invalidate the item analysis (reorders and additions do not).
+    """
+    exam = models.ExamSession
+    values = {exam.questions_version: func.coalesce(exam.questions_version, 0) + 1}
+    if content:
+        values[exam.questions_content_version] = func.coalesce(exam.questions_content_version, 0) + 1
+    db.query(exam).filter(exam.id == exam_id).update(values, synchronize_session=False)
+
+def detach_answers(db: Session, question_ids):
+    """Unlink stored answers from questions about to be deleted; the attempts keep them"""
+    if question_ids:
+        db.query(models.Answer).filter(models.Answer.question_id.in_(list(question_ids))).update(
+            {models.Answer.question_id: None}, synchronize_session=False
+        )
+
+def delete_exam_session(db: Session, exam):
+    """Delete an exam with its questions and item_stats; its attempts stay, without an exam"""
+    questions = db.query(models.Question).filter(models.Question.exam_session_id == exam.id).all()
+    detach_answers(db, [question.id for question in questions])
+    for question in questions:
+        db.delete(question)
+    db.query(models.ItemStat).filter(models.ItemStat.exam_session_id == exam.id).delete(synchronize_session=False)
+    # The attempts fall under key 0 of the rollup once detached
+    exam_stats.reassign(db, exam.id)
+    db.delete(exam)
+
+# Serialized /api/exam/{exam_id}/questions bodies keyed by (exam_id, questions_version).
+# The version lives in the database, so every worker sees edits made through any other.
+exam_questions_cache = cache.TTLCache(maxsize=256)
+
+def build_exam_questions_payload(questions):
+    """Serialize the ordered question list once; returns (body, etag)"""
+    result = []
+    for idx, q in enumerate(questions, start=1):
+        try:
+            options_list = json.loads(q.options) if isinstance(q.options, str) else q.options
+        except Exception:
+            options_list = q.options
+        result.append({
+            "id": q.id,
+            "text": q.text,
+            "options": options_list,
+            "correct_answer": q.correct_answer,
+            "points": q.points,
+            "question_type": q.question_type,
+            "created_at": q.created_at.isoformat() if q.created_at else None,
+            "order_index": q.order_index or idx,
+            "position": idx
+        })
+    body = json.dumps(result).encode("utf-8")
+    return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+# Ordered question list with index, served from the versioned payload cache
 @app.get("/api/exam/{exam_id}/questions")
-def get_exam_questions(exam_id: int, db: Session = Depends(get_db)):
+async def get_exam_questions(exam_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
-        exam = db.query(models.ExamSession).filter(models.ExamSession.id == exam_id).first()
+        exam = (await db.execute(
+            select(models.ExamSession.id, models.ExamSession.questions_version).where(models.ExamSession.id == exam_id)
+        )).first()
         if not exam:
             raise HTTPException(status_code=404, detail="Exam not found")
-        questions = db.query(models.Question).filter(models.Question.exam_session_id == exam_id).order_by(models.Question.order_index.asc().nulls_last(), models.Question.created_at.asc()).all()
-        result = []
-        for idx, q in enumerate(questions, start=1):
-            try:
-                options_list = json.loads(q.options) if isinstance(q.options, str) else q.options
-            except Exception:
-                options_list = q.options
-            result.append({
-                "id": q.id,
-                "text": q.text,
-                "options": options_list,
-                "correct_answer": q.correct_answer,
-                "points": q.points,
-                "question_type": q.question_type,
-                "created_at": q.created_at.isoformat() if q.created_at else None,
-                "order_index": q.order_index or idx
-            })
-        return result
+        key = (exam_id, exam.questions_version or 0)
+        payload = exam_questions_cache.get(key)
+        if payload is None:
+            questions = (await db.execute(
+                select(models.Question).where(models.Question.exam_session_id == exam_id).order_by(*ordering.QUESTION_ORDER)
+            )).scalars().all()
+            payload = build_exam_questions_payload(questions)
+            exam_questions_cache.set(key, payload)
+        body, etag = payload
+        return cached_json_response(request, body, etag)
     except HTTPException:
         raise
     except Exception as e:
@@ -712,6 +1156,9 @@ def delete_question(question_id: int, db: Session = Depends(get_db)):
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
+    if question.exam_session_id:
+        bump_questions_version(db, question.exam_session_id, content=True)
+    detach_answers(db, [question.id])
     db.delete(question)
     db.commit()
     return {"message": "Question deleted successfully"}
@@ -760,39 +1207,63 @@ def cleanup_exams_manual(db: Session = Depends(get_db)):
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+@app.post("/api/verify_attempt_scores")
+def verify_attempt_scores(
+    repair: bool = False,
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_host),
+):
+    """Re-verify the running score counters of every attempt against its answers (hosts only)"""
+    mismatches = scoring.verify_attempt_counters(db, repair=repair)
+    return {
+        "success": True,
+        "mismatch_count": len(mismatches),
+        "repaired": repair,
+        "mismatches": mismatches[:100]
+    }
+
+# Exam catalog served to every candidate on the exam picker; rebuilt at most
+# once per TTL or after a commit that changes exams, questions or attempt counts
+exam_catalog_cache = cache.TTLCache(maxsize=1, ttl=30)
+
+@cache.on_table_change("exam_sessions", "questions")
+@cache.on_table_change("exam_attempts", operations=("insert", "delete"))
+def invalidate_exam_catalog(table_name):
+    exam_catalog_cache.invalidate()
+
+def build_exam_catalog(db: Session):
+    """Serialize the active exam list and its ETag"""
+    current_time = datetime.datetime.utcnow()
+    catalog = [
+        {
+            "id": exam.id,
+            "title": exam.title,
+            "description": exam.description,
+            "duration": exam.duration_minutes,
+            "question_count": exam.question_count,
+            "start_date": exam.start_date.date().isoformat() if exam.start_date else None,
+            "end_date": exam.end_date.date().isoformat() if exam.end_date else None,
+            "start_time": exam.start_date.time().isoformat() if exam.start_date else None,
+            "end_time": exam.end_date.time().isoformat() if exam.end_date else None,
+            "status": exam.status,
+            "participant_count": exam.participant_count,
+            "is_valid": True,  # All exams in this list are valid
+            "days_until_expiry": (exam.end_date - current_time).days if exam.end_date else None
+        }
+        for exam in queries.exam_catalog(db, current_time)
+    ]
+    body = json.dumps(catalog).encode("utf-8")
+    return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
 @app.get("/api/active_exams")
-def get_active_exams(db: Session = Depends(get_db)):
+def get_active_exams(request: Request, db: Session = Depends(get_db)):
     try:
-        current_time = datetime.datetime.utcnow()
-        
-        # Get all exam sessions that are not expired
-        exams = db.query(models.ExamSession).filter(
-            (models.ExamSession.end_date.is_(None)) |  # No end date (always valid)
-            (models.ExamSession.end_date > current_time)  # End date in the future
-        ).all()
-        
-        return [
-            {
-                "id": exam.id,
-                "title": exam.title,
-                "description": exam.description,
-                "duration": exam.duration_minutes,
-                "question_count": db.query(models.Question).filter(
-                    models.Question.exam_session_id == exam.id
-                ).count(),  # Calculate from actual questions
-                "start_date": exam.start_date.date().isoformat() if exam.start_date else None,
-                "end_date": exam.end_date.date().isoformat() if exam.end_date else None,
-                "start_time": exam.start_date.time().isoformat() if exam.start_date else None,
-                "end_time": exam.end_date.time().isoformat() if exam.end_date else None,
-                "status": exam.status,
-                "participant_count": db.query(models.ExamAttempt).filter(
-                    models.ExamAttempt.exam_session_id == exam.id
-                ).count(),
-                "is_valid": True,  # All exams in this list are valid
-                "days_until_expiry": (exam.end_date - current_time).days if exam.end_date else None
-            }
-            for exam in exams
-        ]
+        cached = exam_catalog_cache.get("catalog")
+        if cached is None:
+            cached = build_exam_catalog(db)
+            exam_catalog_cache.set("catalog", cached)
+        body, etag = cached
+        return cached_json_response(request, body, etag)
     except Exception as e:
         return []
 
@@ -803,17 +1274,13 @@ def get_exam_details(exam_id: int, db: Session = Depends(get_db)):
         if not exam:
             raise HTTPException(status_code=404, detail="Exam not found")
         
-        # Get statistics
-        attempts = db.query(models.ExamAttempt).filter(
-            models.ExamAttempt.exam_session_id == exam_id
-        ).all()
-        
-        participant_count = len(attempts)
-        violation_count = sum(attempt.alt_tab_count for attempt in attempts)
+        # Get statistics from the exam_stats rollup
+        stats = exam_stats.read(db, exam_id)
+        participant_count = stats["participants"]
+        violation_count = stats["violations"]
         completion_rate = 0
         if participant_count > 0:
-            completed = sum(1 for attempt in attempts if attempt.end_time)
-            completion_rate = int((completed / participant_count) * 100)
+            completion_rate = int((stats["completed"] / participant_count) * 100)
         
         return {
             "id": exam.id,
@@ -897,13 +1364,8 @@ def delete_exam(exam_id: int, db: Session = Depends(get_db)):
         if exam.status == "active":
             raise HTTPException(status_code=400, detail="Cannot delete an active exam")
         
-        # Delete all questions associated with this exam
-        questions = db.query(models.Question).filter(models.Question.exam_session_id == exam_id).all()
-        for question in questions:
-            db.delete(question)
-        
-        # Delete the exam session
-        db.delete(exam)
+        # Delete the exam session with its questions
+        delete_exam_session(db, exam)
         db.commit()
         
         return {"success": True, "message": "Exam deleted successfully"}
@@ -917,25 +1379,23 @@ def delete_exam(exam_id: int, db: Session = Depends(get_db)):
 def get_exam_participants(exam_id: int, db: Session = Depends(get_db)):
     """Get all participants for a specific exam"""
     try:
-        attempts = db.query(models.ExamAttempt).filter(
-            models.ExamAttempt.exam_session_id == exam_id
-        ).all()
+        attempts = queries.attempts_with_users(
+            db, models.ExamAttempt.exam_session_id == exam_id
+        )
         
         participants = []
         for attempt in attempts:
-            user = db.query(models.User).filter(models.User.id == attempt.user_id).first()
-            if user:
-                status = "completed" if attempt.end_time else "active"
-                participants.append({
-                    "id": user.id,
-                    "name": user.name,
-                    "email": user.email,
-                    "status": status,
-                    "start_time": attempt.start_time.isoformat() if attempt.start_time else None,
-                    "end_time": attempt.end_time.isoformat() if attempt.end_time else None,
-                    "score": attempt.score,
-                    "alt_tab_count": attempt.alt_tab_count
-                })
+            status = "completed" if attempt.end_time else "active"
+            participants.append({
+                "id": attempt.user_id,
+                "name": attempt.user_name,
+                "email": attempt.user_email,
+                "status": status,
+                "start_time": attempt.start_time.isoformat() if attempt.start_time else None,
+                "end_time": attempt.end_time.isoformat() if attempt.end_time else None,
+                "score": attempt.score,
+                "alt_tab_count": attempt.alt_tab_count
+            })
         
         return participants
     except Exception as e:
@@ -945,22 +1405,21 @@ def get_exam_participants(exam_id: int, db: Session = Depends(get_db)):
 def get_exam_violations(exam_id: int, db: Session = Depends(get_db)):
     """Get all violations for a specific exam"""
     try:
-        attempts = db.query(models.ExamAttempt).filter(
+        attempts = queries.attempts_with_users(
+            db,
             models.ExamAttempt.exam_session_id == exam_id,
             models.ExamAttempt.alt_tab_count > 0
-        ).all()
+        )
         
         violations = []
         for attempt in attempts:
-            user = db.query(models.User).filter(models.User.id == attempt.user_id).first()
-            if user and attempt.alt_tab_count > 0:
-                violations.append({
-                    "participant_name": user.name,
-                    "participant_email": user.email,
-                    "count": attempt.alt_tab_count,
-                    "timestamp": attempt.start_time.isoformat() if attempt.start_time else None,
-                    "attempt_id": attempt.id
-                })
+            violations.append({
+                "participant_name": attempt.user_name,
+                "participant_email": attempt.user_email,
+                "count": attempt.alt_tab_count,
+                "timestamp": attempt.start_time.isoformat() if attempt.start_time else None,
+                "attempt_id": attempt.id
+            })
         
         return violations
     except Exception as e:
@@ -970,36 +1429,37 @@ def get_exam_violations(exam_id: int, db: Session = Depends(get_db)):
 def get_exam_activity(exam_id: int, db: Session = Depends(get_db)):
     """Get recent activity for a specific exam"""
     try:
-        attempts = db.query(models.ExamAttempt).filter(
-            models.ExamAttempt.exam_session_id == exam_id
-        ).order_by(models.ExamAttempt.start_time.desc()).limit(20).all()
+        attempts = queries.attempts_with_users(
+            db,
+            models.ExamAttempt.exam_session_id == exam_id,
+            order_by=models.ExamAttempt.start_time.desc(),
+            limit=20
+        )
         
         activities = []
         for attempt in attempts:
-            user = db.query(models.User).filter(models.User.id == attempt.user_id).first()
-            if user:
-                # Start activity
+            # Start activity
+            activities.append({
+                "type": "start",
+                "description": f"{attempt.user_name} started the exam",
+                "timestamp": attempt.start_time.isoformat() if attempt.start_time else None
+            })
+            
+            # Violation activity
+            if attempt.alt_tab_count > 0:
                 activities.append({
-                    "type": "start",
-                    "description": f"{user.name} started the exam",
+                    "type": "violation",
+                    "description": f"{attempt.user_name} had {attempt.alt_tab_count} Alt+Tab violations",
                     "timestamp": attempt.start_time.isoformat() if attempt.start_time else None
                 })
-                
-                # Violation activity
-                if attempt.alt_tab_count > 0:
-                    activities.append({
-                        "type": "violation",
-                        "description": f"{user.name} had {attempt.alt_tab_count} Alt+Tab violations",
-                        "timestamp": attempt.start_time.isoformat() if attempt.start_time else None
-                    })
-                
-                # Completion activity
-                if attempt.end_time:
-                    activities.append({
-                        "type": "complete",
-                        "description": f"{user.name} completed the exam with score {attempt.score}",
-                        "timestamp": attempt.end_time.isoformat() if attempt.end_time else None
-                    })
+            
+            # Completion activity
+            if attempt.end_time:
+                activities.append({
+                    "type": "complete",
+                    "description": f"{attempt.user_name} completed the exam with score {attempt.score}",
+                    "timestamp": attempt.end_time.isoformat() if attempt.end_time else None
+                })
         
         # Sort by timestamp (newest first)
         activities.sort(key=lambda x: x["timestamp"] or "", reverse=True)
@@ -1007,18 +1467,103 @@ def get_exam_activity(exam_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         return []
 
+@app.get("/api/exam/{exam_id}/events")
+async def exam_events(exam_id: int, request: Request, current_user: UserSnapshot = Depends(get_current_host_for_stream)):
+    """Server-Sent Events stream of attempt starts, answers, completions and violations for one exam (hosts only)"""
+    return StreamingResponse(
+        events.broker.stream(request, exam_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/events")
+async def all_exam_events(request: Request, current_user: UserSnapshot = Depends(get_current_host_for_stream)):
+    """Server-Sent Events stream across all exams (host dashboard overview, hosts only)"""
+    return StreamingResponse(
+        events.broker.stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/exam/{exam_id}/export")
+def export_exam(exam_id: int, format: str = "csv", kind: str = "attempts", db: Session = Depends(get_db)):
+    """Stream an exam's attempts (or, with kind=answers, every answer) as CSV or NDJSON"""
+    if format not in exports.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    if kind not in ("attempts", "answers"):
+        raise HTTPException(status_code=400, detail="kind must be attempts or answers")
+    exam = db.query(models.ExamSession.id).filter(models.ExamSession.id == exam_id).first()
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    filename = f"exam_{exam_id}_{kind}.{format}"
+    return StreamingResponse(
+        exports.stream_export(exam_id, kind, format),
+        media_type=exports.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    )
+
+@app.get("/api/exam/{exam_id}/item_analysis")
+def get_item_analysis(exam_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Per-question difficulty, discrimination, distractor and timing statistics.
+
+    Read-only: served from the materialized item_stats sums. Attempts
+    completed since the last fold (or a rebuild after question edits) are
+    handled by a background refresh, reported through ``refreshing``.
+    """
+    exam = db.query(models.ExamSession.id, models.ExamSession.questions_content_version).filter(
+        models.ExamSession.id == exam_id
+    ).first()
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    try:
+        stale = item_analysis.is_stale(db, exam_id, exam.questions_content_version or 0)
+        pending = item_analysis.pending_count(db, exam_id)
+        if stale or pending:
+            background_tasks.add_task(item_analysis.refresh_in_background, exam_id)
+        stats = db.query(models.ItemStat).filter(models.ItemStat.exam_session_id == exam_id).all()
+        questions = {
+            q.id: q for q in db.query(models.Question).filter(
+                models.Question.id.in_([stat.question_id for stat in stats])
+            )
+        }
+        analyzed = db.query(func.count(models.ExamAttempt.id)).filter(
+            models.ExamAttempt.exam_session_id == exam_id,
+            models.ExamAttempt.item_stats_applied == True  # noqa: E712
+        ).scalar()
+        return {
+            "exam_id": exam_id,
+            "attempts_analyzed": analyzed or 0,
+            "attempts_pending": pending,
+            "refreshing": bool(stale or pending),
+            "questions": item_analysis.summarize(stats, questions),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute item analysis: {str(e)}")
+
+@app.post("/api/exam/{exam_id}/item_analysis/rebuild")
+def rebuild_item_analysis(exam_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Drop the exam's item_stats and recompute them from every completed attempt in the background"""
+    exam = db.query(models.ExamSession.id).filter(models.ExamSession.id == exam_id).first()
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    try:
+        item_analysis.reset(db, exam_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to reset item analysis: {str(e)}")
+    background_tasks.add_task(item_analysis.refresh_in_background, exam_id)
+    return {"success": True, "refreshing": True}
+
 @app.get("/api/exam/{exam_id}/stats")
 def get_exam_stats(exam_id: int, db: Session = Depends(get_db)):
     """Get real-time statistics for a specific exam"""
     try:
-        attempts = db.query(models.ExamAttempt).filter(
-            models.ExamAttempt.exam_session_id == exam_id
-        ).all()
-        
-        total_participants = len(attempts)
-        active_participants = sum(1 for attempt in attempts if not attempt.end_time)
-        total_violations = sum(attempt.alt_tab_count for attempt in attempts)
-        completed_attempts = sum(1 for attempt in attempts if attempt.end_time)
+        stats = exam_stats.read(db, exam_id)
+        total_participants = stats["participants"]
+        active_participants = stats["active"]
+        total_violations = stats["violations"]
+        completed_attempts = stats["completed"]
         
         completion_rate = 0
         if total_participants > 0:
@@ -1043,18 +1588,11 @@ def get_exam_stats(exam_id: int, db: Session = Depends(get_db)):
 @app.get("/api/stats")
 def get_dashboard_stats(db: Session = Depends(get_db)):
     try:
-        total_participants = db.query(models.ExamAttempt).count()
-        active_participants = db.query(models.ExamAttempt).filter(
-            models.ExamAttempt.end_time.is_(None)
-        ).count()
-        total_violations = db.query(models.ExamAttempt).with_entities(
-            func.sum(models.ExamAttempt.alt_tab_count)
-        ).scalar() or 0
-        
+        stats = exam_stats.totals(db)
         return {
-            "totalParticipants": total_participants,
-            "activeParticipants": active_participants,
-            "totalViolations": total_violations
+            "totalParticipants": stats["participants"],
+            "activeParticipants": stats["active"],
+            "totalViolations": stats["violations"]
         }
     except Exception as e:
         return {
@@ -1066,17 +1604,16 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
 @app.get("/api/participants")
 def get_active_participants(db: Session = Depends(get_db)):
     try:
-        active_attempts = db.query(models.ExamAttempt).filter(
-            models.ExamAttempt.end_time.is_(None)
-        ).all()
+        active_attempts = queries.attempts_with_users(
+            db, models.ExamAttempt.end_time.is_(None), include_orphans=True
+        )
         
         participants = []
         for attempt in active_attempts:
-            user = db.query(models.User).filter(models.User.id == attempt.user_id).first()
-            progress = int((len(attempt.answered_questions) / 5) * 100)  # Assuming 5 questions
+            progress = int(((attempt.answers_count or 0) / 5) * 100)  # Assuming 5 questions
             
             participants.append({
-                "name": user.name if user else "Unknown",
+                "name": attempt.user_name or "Unknown",
                 "status": "online",
                 "exam_title": "Current Exam",  # You can enhance this
                 "progress": progress
@@ -1090,56 +1627,86 @@ def get_active_participants(db: Session = Depends(get_db)):
 def get_recent_violations(db: Session = Depends(get_db)):
     try:
         # Get recent attempts with violations
-        recent_attempts = db.query(models.ExamAttempt).filter(
-            models.ExamAttempt.alt_tab_count > 0
-        ).order_by(models.ExamAttempt.start_time.desc()).limit(10).all()
+        recent_attempts = queries.attempts_with_users(
+            db,
+            models.ExamAttempt.alt_tab_count > 0,
+            order_by=models.ExamAttempt.start_time.desc(),
+            limit=10,
+            include_orphans=True
+        )
         
         violations = []
         for attempt in recent_attempts:
-            user = db.query(models.User).filter(models.User.id == attempt.user_id).first()
             violations.append({
-                "participant_name": user.name if user else "Unknown",
+                "participant_name": attempt.user_name or "Unknown",
                 "reason": f"Alt-Tab violation (Count: {attempt.alt_tab_count})",
                 "timestamp": attempt.start_time.isoformat()
             })
         
         # Add native monitoring violations
-        if native_monitor.violations:
-            for violation in native_monitor.violations[-5:]:  # Last 5 violations
-                violations.append({
-                    "participant_name": "System Monitor",
-                    "reason": f"{violation.get('type', 'Native')} - {violation.get('description', '')}",
-                    "timestamp": violation.get("timestamp", "Unknown"),
-                    "exam_id": violation.get("exam_attempt_id", "Unknown")
-                })
+        for violation in native_monitor.last(5):  # Last 5 violations
+            violations.append({
+                "participant_name": "System Monitor",
+                "reason": f"{violation.get('type', 'Native')} - {violation.get('description', '')}",
+                "timestamp": violation.get("timestamp", "Unknown"),
+                "exam_id": violation.get("exam_attempt_id", "Unknown")
+            })
         
         return violations
     except Exception as e:
         return []
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text-format request and SQL metrics"""
+    return Response(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/api/native_violations")
-def get_native_violations():
-    """Get current native monitoring violations"""
+def get_native_violations(attempt_id: int = None, limit: int = 50):
+    """Get the newest native monitoring violations, for one attempt or all monitored attempts"""
     return {
         "is_active": native_monitor.is_active,
         "current_exam_id": native_monitor.exam_attempt_id,
-        "violations": native_monitor.violations,
-        "total_violations": len(native_monitor.violations)
+        "active_attempts": native_monitor.active_attempts(),
+        "violations": native_monitor.last(max(0, min(limit, native_monitor.capacity)), attempt_id),
+        "total_violations": native_monitor.total(attempt_id)
     } 
 
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "512"))
+# Serialized analyses of completed attempts keyed by attempt ID: submit_answer
+# refuses ended attempts, so only the question/user edits below change them.
+# Browsers still revalidate (no-cache + ETag) because those edits can happen.
+attempt_analysis_cache = cache.TTLCache(maxsize=ANALYSIS_CACHE_SIZE)
+
+@cache.on_table_change("questions", "users", operations=("update", "delete"))
+@cache.on_table_change("exam_attempts", operations=("delete",))
+def invalidate_attempt_analysis_cache(table_name):
+    # Analyses embed question text and user names
+    attempt_analysis_cache.invalidate()
+
 @app.get("/get_exam_analysis/{attempt_id}")
-def get_exam_analysis(attempt_id: int, db: Session = Depends(get_db)):
+def get_exam_analysis(attempt_id: int, request: Request, db: Session = Depends(get_db)):
     """Get detailed analysis of an exam attempt including question-by-question breakdown"""
+    cached = attempt_analysis_cache.get(attempt_id)
+    if cached is not None:
+        return cached_json_response(request, *cached)
+    
     exam_attempt = db.query(models.ExamAttempt).filter(models.ExamAttempt.id == attempt_id).first()
     if not exam_attempt:
         raise HTTPException(status_code=404, detail="Exam attempt not found")
     
     user = db.query(models.User).filter(models.User.id == exam_attempt.user_id).first()
+    answered_questions = exam_attempt.answered_questions
     
-    # Get detailed question information
+    # Get detailed question information, all referenced questions in one query
+    question_ids = {answer["question_id"] for answer in answered_questions}
+    questions = {
+        question.id: question
+        for question in db.query(models.Question).filter(models.Question.id.in_(question_ids))
+    } if question_ids else {}
     detailed_questions = []
-    for answer in exam_attempt.answered_questions:
-        question = db.query(models.Question).filter(models.Question.id == answer["question_id"]).first()
+    for answer in answered_questions:
+        question = questions.get(answer["question_id"])
         if question:
             detailed_questions.append({
                 "question_id": answer["question_id"],
@@ -1161,14 +1728,18 @@ def get_exam_analysis(attempt_id: int, db: Session = Depends(get_db)):
         "duration_seconds": exam_attempt.duration_seconds,
         "duration_formatted": f"{exam_attempt.duration_seconds // 60}m {exam_attempt.duration_seconds % 60}s" if exam_attempt.duration_seconds else "N/A",
         "score": exam_attempt.score,
-        "total_questions": len(exam_attempt.answered_questions),
+        "total_questions": len(answered_questions),
         "average_time_per_question_seconds": exam_attempt.average_time_per_question_seconds,
         "average_time_formatted": f"{int(exam_attempt.average_time_per_question_seconds // 60)}m {int(exam_attempt.average_time_per_question_seconds % 60)}s" if exam_attempt.average_time_per_question_seconds else "N/A",
         "alt_tab_count": exam_attempt.alt_tab_count,
         "detailed_questions": detailed_questions
     }
     
-    return analysis 
+    body = json.dumps(analysis).encode("utf-8")
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    if exam_attempt.end_time is not None:
+        attempt_analysis_cache.set(attempt_id, (body, etag))
+    return cached_json_response(request, body, etag)
 
 def parse_ai_response(response, topic, num_questions):
     """Parse AI response and extract questions"""
@@ -1191,37 +1762,16 @@ def parse_ai_response(response, topic, num_questions):
     # Fallback to smart generation
     return generate_smart_questions(topic, num_questions) 
 
-@app.get("/api/exam/{exam_id}/attempts")
-def get_exam_attempts(exam_id: int, db: Session = Depends(get_db)):
-    """Get all exam attempts for a specific exam session"""
+@app.get("/api/exam/{exam_id}/attempts", response_model=schemas.AttemptPage)
+def get_exam_attempts(exam_id: int, params: dict = Depends(attempt_list_params), db: Session = Depends(get_db)):
+    """Get one page of attempts for a specific exam session"""
     try:
         # Verify exam exists
-        exam = db.query(models.ExamSession).filter(models.ExamSession.id == exam_id).first()
+        exam = db.query(models.ExamSession.id).filter(models.ExamSession.id == exam_id).first()
         if not exam:
             raise HTTPException(status_code=404, detail="Exam not found")
         
-        # Get attempts for this exam
-        attempts = db.query(models.ExamAttempt).filter(models.ExamAttempt.exam_session_id == exam_id).all()
-        
-        result = []
-        for attempt in attempts:
-            user = db.query(models.User).filter(models.User.id == attempt.user_id).first()
-            result.append({
-                "id": attempt.id,
-                "user_id": attempt.user_id,
-                "user_name": user.name if user else "Unknown User",
-                "user_email": user.email if user else "Unknown Email",
-                "start_time": attempt.start_time.isoformat() if attempt.start_time else None,
-                "end_time": attempt.end_time.isoformat() if attempt.end_time else None,
-                "duration_seconds": attempt.duration_seconds,
-                "alt_tab_count": attempt.alt_tab_count,
-                "score": attempt.score,
-                "total_questions": len(attempt.answered_questions) if attempt.answered_questions else 0,
-                "average_time_per_question_seconds": attempt.average_time_per_question_seconds,
-                "status": "completed" if attempt.end_time else "in_progress"
-            })
-        
-        return result
+        return attempt_list_page(db, params, models.ExamAttempt.exam_session_id == exam_id, include_orphans=True)
     except HTTPException:
         raise
     except Exception as e:
@@ -1330,15 +1880,8 @@ def cleanup_invalid_exams(db: Session):
         
         deleted_count = 0
         for exam in expired_exams:
-            # Delete associated questions first
-            questions = db.query(models.Question).filter(
-                models.Question.exam_session_id == exam.id
-            ).all()
-            for question in questions:
-                db.delete(question)
-            
-            # Delete the exam session
-            db.delete(exam)
+            # Delete the exam session with its questions
+            delete_exam_session(db, exam)
             deleted_count += 1
         
         if deleted_count > 0:
@@ -1431,27 +1974,52 @@ def create_default_trial_exam(db: Session):
         db.rollback()
         return None
 
+# Bump to re-run the one-off startup work on existing databases
+SEED_DATA_VERSION = "1"
+SCORE_COUNTERS_VERSION = "1"
+EXAM_STATS_VERSION = "1"
+
+startup_timings = {}
+
 @app.on_event("startup")
 async def on_startup():
     """Initialize the application on startup"""
     print("Starting Professional Exam System...")
+    started = time.perf_counter()
+    startup_timings["import_seconds"] = started - BOOT_STARTED
     
-    # Create database tables
-    models.Base.metadata.create_all(bind=engine)
+    # Create tables and apply migrations, unless the stamped schema is already current
+    if migrations.ensure_schema(engine):
+        print("🛠️ Database schema updated")
+    startup_timings["schema_seconds"] = time.perf_counter() - started
     
     # Initialize database
     db = SessionLocal()
     try:
-        # Run lightweight migrations
-        run_sqlite_migrations()
-
         # Clean up invalid/expired exams
         cleanup_invalid_exams(db)
-        
-        # Add sample questions (for general use)
-        add_sample_questions(db)
-        
-        # Create default trial exam
+
+        # Backfill/repair running score counters (e.g. attempts from before the counters existed)
+        if migrations.get_stamp(engine, "score_counters") != SCORE_COUNTERS_VERSION:
+            repaired = scoring.verify_attempt_counters(db, repair=True)
+            if repaired:
+                print(f"🔧 Repaired score counters for {len(repaired)} attempts")
+            migrations.set_stamp(engine, "score_counters", SCORE_COUNTERS_VERSION)
+        
+        # Build the exam_stats rollup from the attempts (first run, or after a rollup change)
+        if migrations.get_stamp(engine, "exam_stats") != EXAM_STATS_VERSION:
+            drift = exam_stats.repair(db)
+            if drift:
+                print(f"📊 Rebuilt exam stats for {len(drift)} exams")
+            migrations.set_stamp(engine, "exam_stats", EXAM_STATS_VERSION)
+        
+        if migrations.get_stamp(engine, "seed_data") != SEED_DATA_VERSION:
+            # Add sample questions (for general use)
+            add_sample_questions(db)
+            migrations.set_stamp(engine, "seed_data", SEED_DATA_VERSION)
+        
+        # Create default trial exam; checked on every boot because expiry cleanup
+        # or a host can delete it
         trial_exam_id = create_default_trial_exam(db)
         if trial_exam_id:
             print(f"🎯 Default trial exam available with ID: {trial_exam_id}")
@@ -1459,7 +2027,20 @@ async def on_startup():
     finally:
         db.close()
     
-    print("Application startup complete!") 
+    # Periodic batch writer for violation events
+    violations.buffer.start()
+    
+    startup_timings["startup_seconds"] = time.perf_counter() - started
+    startup_timings["total_seconds"] = time.perf_counter() - BOOT_STARTED
+    print(
+        f"Application startup complete! ({startup_timings['startup_seconds'] * 1000:.0f} ms startup, "
+        f"{startup_timings['total_seconds'] * 1000:.0f} ms since import)"
+    )
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await violations.buffer.stop()
+    passwords.pool.shutdown()
 
 def build_ai_prompt(topic: str, num_questions: int) -> str:
     """Construct a deterministic prompt asking for strict JSON output."""
@@ -1519,6 +2100,11 @@ def extract_questions_from_text(text: str, num_questions: int):
     except Exception:
         return None 
 
+async def post_ai_service(url, **kwargs):
+    """POST to an AI inference API off the event loop; requests is only imported when AI generation is used"""
+    import requests
+    return await run_in_threadpool(requests.post, url, **kwargs)
+
 @app.post("/api/ai_generate_questions_unique")
 async def ai_generate_questions_unique(request: Request, db: Session = Depends(get_db)):
     """Generate unique questions using AI with better prompt engineering and duplicate prevention"""
@@ -1557,7 +2143,7 @@ async def ai_generate_questions_unique(request: Request, db: Session = Depends(g
             api_url = "https://api-inference.huggingface.co/models/microsoft/DialoGPT-large"
             headers = {"Authorization": "Bearer hf_demo"}
             
-            response = requests.post(
+            response = await post_ai_service(
                 api_url,
                 headers=headers,
                 json={
@@ -1586,7 +2172,7 @@ async def ai_generate_questions_unique(request: Request, db: Session = Depends(g
                 api_url = "https://api-inference.huggingface.co/models/gpt2"
                 headers = {"Authorization": "Bearer hf_demo"}
                 
-                response = requests.post(
+                response = await post_ai_service(
                     api_url,
                     headers=headers,
                     json={
@@ -1654,6 +2240,8 @@ async def ai_generate_questions_unique(request: Request, db: Session = Depends(g
                         print(f"Error creating question: {e}")
                         continue
                 
+                if exam_id:
+                    bump_questions_version(db, exam_id)
                 db.commit()
                 return {
                     "success": True,
@@ -1700,6 +2288,8 @@ async def ai_generate_questions_unique(request: Request, db: Session = Depends(g
                 print(f"Error creating smart question: {e}")
                 continue
         
+        if exam_id:
+            bump_questions_version(db, exam_id)
         db.commit()
         return {
             "success": True,
@@ -1728,6 +2318,8 @@ async def ai_generate_questions_unique(request: Request, db: Session = Depends(g
                     print(f"Error creating fallback question: {e}")
                     continue
             
+            if exam_id:
+                bump_questions_version(db, exam_id)
             db.commit()
             return {
                 "success": True,
@@ -0,0 +1,202 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+
+# Latency buckets in seconds and response-size buckets in bytes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# SQL counters of the request being served: [statement count, total seconds]
+_request_sql = contextvars.ContextVar("request_sql", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout (not thread-safe; guarded by the registry lock)"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class RouteStats:
+    __slots__ = ("latency", "size", "statuses", "sql_statements", "sql_seconds")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses = {}
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+
+
+class MetricsRegistry:
+    """Per-route request metrics, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._in_flight = {}
+        self._collectors = []
+
+    def register_collector(self, name, kind, help_text, read):
+        """Expose a value owned by another module; ``read()`` is called on every scrape"""
+        self._collectors.append((name, kind, help_text, read))
+
+    def request_started(self, method):
+        with self._lock:
+            self._in_flight[method] = self._in_flight.get(method, 0) + 1
+
+    def request_finished(self, method, route, status, seconds, size, sql_statements, sql_seconds):
+        with self._lock:
+            self._in_flight[method] -= 1
+            stats = self._routes.get((method, route))
+            if stats is None:
+                stats = self._routes[(method, route)] = RouteStats()
+            stats.latency.observe(seconds)
+            stats.size.observe(size)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.sql_statements += sql_statements
+            stats.sql_seconds += sql_seconds
+
+    def render(self):
+        with self._lock:
+            lines = [
+                "# HELP http_requests_in_flight Requests currently being served.",
+                "# TYPE http_requests_in_flight gauge",
+            ]
+            for method, value in sorted(self._in_flight.items()):
+                lines.append(f'http_requests_in_flight{{method="{method}"}} {value}')
+
+            routes = sorted(self._routes.items())
+            sections = (
+                ("http_requests_total", "counter", "Requests served, by status code."),
+                ("http_request_duration_seconds", "histogram", "Request latency."),
+                ("http_response_size_bytes", "histogram", "Response body size."),
+                ("db_statements_total", "counter", "SQL statements executed while serving requests."),
+                ("db_statement_seconds_total", "counter", "Time spent in SQL statements while serving requests."),
+            )
+            for name, kind, help_text in sections:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for (method, route), stats in routes:
+                    labels = f'method="{method}",route="{_escape(route)}"'
+                    if name == "http_requests_total":
+                        for status, count in sorted(stats.statuses.items()):
+                            lines.append(f'{name}{{{labels},status="{status}"}} {count}')
+                    elif name == "http_request_duration_seconds":
+                        lines.extend(stats.latency.render(name, labels))
+                    elif name == "http_response_size_bytes":
+                        lines.extend(stats.size.render(name, labels))
+                    elif name == "db_statements_total":
+                        lines.append(f"{name}{{{labels}}} {stats.sql_statements}")
+                    else:
+                        lines.append(f"{name}{{{labels}}} {stats.sql_seconds}")
+            collectors = list(self._collectors)
+        for name, kind, help_text, read in collectors:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+registry = MetricsRegistry()
+
+
+def route_template(scope, root_path=""):
+    """Route path as declared (e.g. /api/exam/{exam_id}), so IDs do not explode label cardinality"""
+    path = getattr(scope.get("route"), "path", None)
+    if path is not None:
+        return path
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        # Mounted app (e.g. /static): one series for the whole mount
+        return mounted[len(root_path):] + "/{path}"
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each HTTP request and counting its SQL statements"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        status = [500]
+        size = [0]
+        sql = [0, 0.0]
+        token = _request_sql.set(sql)
+        registry.request_started(method)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_sql.reset(token)
+            registry.request_finished(
+                method, route_template(scope, root_path), status[0],
+                time.perf_counter() - start, size[0], sql[0], sql[1],
+            )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_sql.get() is not None:
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    sql = _request_sql.get()
+    starts = conn.info.get("metrics_query_start")
+    if sql is None or not starts:
+        return
+    sql[0] += 1
+    sql[1] += time.perf_counter() - starts.pop()
+
+
+def instrument_engine(sync_engine):
+    """Attribute the engine's SQL statements to the request being served"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,337 @@
+"""Versioned schema migrations for SQLite and PostgreSQL.
+
+Each migration runs once, in its own transaction, and is recorded in the
+``schema_migrations`` table. Steps are written to be idempotent so they also
+succeed on databases created by ``Base.metadata.create_all``.
+
+Startup compares a fingerprint of the models and the migration list with
+the one stamped in ``app_stamps``; when they match, schema work is skipped.
+
+Usage:
+    python migrations.py upgrade       # apply pending migrations
+    python migrations.py status        # list applied / pending migrations
+    python migrations.py check-plans   # verify hot queries use their indexes
+"""
+import datetime
+import hashlib
+import sys
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, Integer, MetaData, String, Table, inspect, select, text,
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.types import TypeEngine
+
+import models
+
+MIGRATIONS = []
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent workers migrate one at a time
+PG_MIGRATION_LOCK_KEY = 7_310_224
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+# Named version stamps for one-off startup work (schema fingerprint, seed data, backfills)
+app_stamps = Table(
+    "app_stamps", _metadata,
+    Column("name", String, primary_key=True),
+    Column("value", String, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+
+def migration(version, name):
+    """Register a migration step; versions must be unique and increasing"""
+    def decorator(func):
+        MIGRATIONS.append((version, name, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return decorator
+
+
+# ---- Helpers ----
+
+def has_table(connection, table_name):
+    return inspect(connection).has_table(table_name)
+
+
+def has_column(connection, table_name, column_name):
+    return any(col["name"] == column_name for col in inspect(connection).get_columns(table_name))
+
+
+def add_column(connection, table_name, column_name, column_type, default=None):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    if has_column(connection, table_name, column_name):
+        return False
+    if isinstance(column_type, type):
+        column_type = column_type()
+    if isinstance(column_type, TypeEngine):
+        column_type = column_type.compile(dialect=connection.dialect)
+    ddl = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"
+    if default is not None:
+        ddl += f" DEFAULT {default}"
+    connection.execute(text(ddl))
+    return True
+
+
+def create_index(connection, name, table_name, columns, unique=False):
+    connection.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} "
+        f"ON {table_name} ({', '.join(columns)})"
+    ))
+
+
+# ---- Migrations ----
+
+@migration(1, "legacy_columns")
+def _legacy_columns(connection):
+    """Columns previously added by run_sqlite_migrations"""
+    add_column(connection, "exam_sessions", "start_date", DateTime)
+    add_column(connection, "exam_sessions", "end_date", DateTime)
+    if add_column(connection, "exam_attempts", "alt_tab_count", Integer, default=0):
+        connection.execute(text("UPDATE exam_attempts SET alt_tab_count = 0 WHERE alt_tab_count IS NULL"))
+    if add_column(connection, "exam_attempts", "answered_questions", "TEXT"):
+        connection.execute(text("UPDATE exam_attempts SET answered_questions = '[]' WHERE answered_questions IS NULL"))
+    add_column(connection, "exam_attempts", "duration_seconds", Integer)
+    add_column(connection, "exam_attempts", "average_time_per_question_seconds", Float)
+    add_column(connection, "questions", "order_index", Integer)
+
+
+@migration(2, "answers_unique_key")
+def _answers_unique_key(connection):
+    add_column(connection, "answers", "correct_answer", String)
+    create_index(connection, "uq_answers_attempt_question", "answers", ["exam_attempt_id", "question_id"], unique=True)
+
+
+@migration(3, "attempt_score_counters")
+def _attempt_score_counters(connection):
+    add_column(connection, "exam_attempts", "answers_count", Integer, default=0)
+    add_column(connection, "exam_attempts", "correct_answers", Integer, default=0)
+    add_column(connection, "exam_attempts", "points_earned", Integer, default=0)
+    add_column(connection, "exam_attempts", "total_time_seconds", Float, default=0)
+
+
+@migration(4, "exam_questions_version")
+def _exam_questions_version(connection):
+    add_column(connection, "exam_sessions", "questions_version", Integer, default=0)
+
+
+@migration(5, "hot_path_indexes")
+def _hot_path_indexes(connection):
+    create_index(connection, "ix_exam_attempts_exam_end", "exam_attempts", ["exam_session_id", "end_time"])
+    create_index(connection, "ix_exam_attempts_user_exam_end", "exam_attempts", ["user_id", "exam_session_id", "end_time"])
+    create_index(connection, "ix_exam_attempts_alt_tab_start", "exam_attempts", ["alt_tab_count", "start_time"])
+    create_index(connection, "ix_questions_exam_order", "questions", ["exam_session_id", "order_index"])
+    create_index(connection, "ix_exam_sessions_end_date", "exam_sessions", ["end_date"])
+
+
+@migration(6, "attempt_keyset_indexes")
+def _attempt_keyset_indexes(connection):
+    """(start_time, id) orderings used by the paginated attempt lists"""
+    create_index(connection, "ix_exam_attempts_exam_start", "exam_attempts", ["exam_session_id", "start_time", "id"])
+    create_index(connection, "ix_exam_attempts_user_start", "exam_attempts", ["user_id", "start_time", "id"])
+    create_index(connection, "ix_exam_attempts_start", "exam_attempts", ["start_time", "id"])
+
+
+@migration(7, "item_stats")
+def _item_stats(connection):
+    """The item_stats table itself comes from create_all"""
+    add_column(connection, "exam_attempts", "item_stats_applied", Boolean, default="FALSE")
+
+
+@migration(8, "questions_content_version")
+def _questions_content_version(connection):
+    add_column(connection, "exam_sessions", "questions_content_version", Integer, default=0)
+
+
+# ---- Runner ----
+
+def applied_versions(connection):
+    if not has_table(connection, "schema_migrations"):
+        return set()
+    return {row[0] for row in connection.execute(select(schema_migrations.c.version))}
+
+
+def upgrade(engine):
+    """Apply pending migrations in order; returns the list of applied versions"""
+    _metadata.create_all(bind=engine)
+    applied = []
+    for version, name, func in MIGRATIONS:
+        with engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PG_MIGRATION_LOCK_KEY})
+            if version in applied_versions(connection):
+                continue
+            func(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.datetime.utcnow()
+            ))
+        applied.append(version)
+        print(f"🛠️ Applied migration {version:03d}_{name}")
+    return applied
+
+
+def schema_fingerprint():
+    """Changes whenever a migration or a model table, column (type, nullability, keys) or index changes"""
+    parts = [f"migration:{version}" for version, _, _ in MIGRATIONS]
+    for table in sorted(models.Base.metadata.tables.values(), key=lambda t: t.name):
+        columns = sorted(
+            f"{column.name} {column.type} null={column.nullable} pk={column.primary_key} "
+            f"fk={','.join(sorted(fk.target_fullname for fk in column.foreign_keys))}"
+            for column in table.columns
+        )
+        indexes = sorted(
+            f"{index.name} unique={index.unique} ({','.join(column.name for column in index.columns)})"
+            for index in table.indexes
+        )
+        parts.append(f"{table.name}:" + ",".join(columns) + ";" + ",".join(indexes))
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def get_stamp(engine, name):
+    """Stamped value, or None when unset (or the stamps table does not exist yet)"""
+    try:
+        with engine.connect() as connection:
+            return connection.execute(
+                select(app_stamps.c.value).where(app_stamps.c.name == name)
+            ).scalar()
+    except DBAPIError:
+        return None
+
+
+def set_stamp(engine, name, value):
+    _metadata.create_all(bind=engine, tables=[app_stamps])
+    with engine.begin() as connection:
+        values = {"value": str(value), "updated_at": datetime.datetime.utcnow()}
+        updated = connection.execute(
+            app_stamps.update().where(app_stamps.c.name == name).values(**values)
+        ).rowcount
+        if not updated:
+            connection.execute(app_stamps.insert().values(name=name, **values))
+
+
+def ensure_schema(engine):
+    """create_all + upgrade, skipped entirely when the stamped fingerprint is current.
+
+    Returns True when schema work ran.
+    """
+    fingerprint = schema_fingerprint()
+    if get_stamp(engine, "schema") == fingerprint:
+        return False
+    models.Base.metadata.create_all(bind=engine)
+    upgrade(engine)
+    set_stamp(engine, "schema", fingerprint)
+    return True
+
+
+def status(engine):
+    with engine.connect() as connection:
+        done = applied_versions(connection)
+    return [(version, name, version in done) for version, name, _ in MIGRATIONS]
+
+
+# ---- Query plan checks ----
+
+def hot_queries():
+    """(description, statement, index or indexes acceptable in its plan) for the production hot paths"""
+    attempt = models.ExamAttempt
+    question = models.Question
+    exam = models.ExamSession
+    now = datetime.datetime.utcnow()
+    return [
+        (
+            "resume lookup in start_exam_simple",
+            select(attempt.id).where(attempt.user_id == 1, attempt.exam_session_id == 1, attempt.end_time.is_(None)),
+            "ix_exam_attempts_user_exam_end",
+        ),
+        (
+            "open attempts of an exam",
+            select(attempt.id).where(attempt.exam_session_id == 1, attempt.end_time.is_(None)),
+            "ix_exam_attempts_exam_end",
+        ),
+        (
+            "recent violations",
+            select(attempt.id).where(attempt.alt_tab_count > 0).order_by(attempt.start_time.desc()).limit(10),
+            # Either filtering on violations or walking start_time until 10 match is fine
+            ("ix_exam_attempts_alt_tab_start", "ix_exam_attempts_start"),
+        ),
+        (
+            "exam attempts page",
+            select(attempt.id).where(attempt.exam_session_id == 1)
+            .order_by(attempt.start_time.desc(), attempt.id.desc()).limit(50),
+            "ix_exam_attempts_exam_start",
+        ),
+        (
+            "ordered exam questions",
+            select(question.id).where(question.exam_session_id == 1).order_by(question.order_index),
+            "ix_questions_exam_order",
+        ),
+        (
+            "expired exam cleanup",
+            select(exam.id).where(exam.end_date.isnot(None), exam.end_date < now),
+            "ix_exam_sessions_end_date",
+        ),
+    ]
+
+
+def explain(connection, statement):
+    compiled = statement.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup) if compiled.positional else compiled.params
+    prefix = "EXPLAIN QUERY PLAN " if connection.dialect.name == "sqlite" else "EXPLAIN "
+    rows = connection.exec_driver_sql(prefix + str(compiled), params).fetchall()
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+
+def check_query_plans(engine):
+    """EXPLAIN each hot query and report whether it uses its index.
+
+    On PostgreSQL sequential scans are disabled for the check, so small
+    development tables do not hide a missing or unusable index.
+    """
+    results = []
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SET LOCAL enable_seqscan = off"))
+        for description, statement, index_names in hot_queries():
+            if isinstance(index_names, str):
+                index_names = (index_names,)
+            plan = explain(connection, statement)
+            results.append({
+                "query": description,
+                "index": " or ".join(index_names),
+                "uses_index": any(name in plan for name in index_names),
+                "plan": plan,
+            })
+        connection.rollback()
+    return results
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "upgrade":
+        models.Base.metadata.create_all(bind=engine)
+        applied = upgrade(engine)
+        set_stamp(engine, "schema", schema_fingerprint())
+        print(f"Applied {len(applied)} migrations" if applied else "Database schema is up to date")
+    elif command == "status":
+        for version, name, done in status(engine):
+            print(f"{'[x]' if done else '[ ]'} {version:03d}_{name}")
+    elif command == "check-plans":
+        failures = 0
+        for result in check_query_plans(engine):
+            mark = "✅" if result["uses_index"] else "❌"
+            print(f"{mark} {result['query']}: expects {result['index']}")
+            if not result["uses_index"]:
+                failures += 1
+                print("   " + result["plan"].replace("\n", "\n   "))
+        sys.exit(1 if failures else 0)
+    else:
+        print(__doc__)
+        sys.exit(2)
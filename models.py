@@ -1,5 +1,6 @@
 import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, JSON, Date, Time, Boolean, Text
+import json
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, JSON, Date, Time, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -17,6 +18,9 @@ class User(Base):
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_exam_order", "exam_session_id", "order_index"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     text = Column(String, nullable=False)
@@ -30,6 +34,9 @@ class Question(Base):
 
 class ExamSession(Base):
     __tablename__ = "exam_sessions"
+    __table_args__ = (
+        Index("ix_exam_sessions_end_date", "end_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -38,6 +45,8 @@ class ExamSession(Base):
     status = Column(String, default="draft")  # draft, active, completed, cancelled
     start_date = Column(DateTime, nullable=True)  # When the exam becomes available
     end_date = Column(DateTime, nullable=True)    # When the exam expires
+    questions_version = Column(Integer, default=0)  # bumped whenever the exam's questions change
+    questions_content_version = Column(Integer, default=0)  # bumped by edits and deletes, not reorders
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     
     attempts = relationship("ExamAttempt", back_populates="exam_session")
@@ -48,6 +57,15 @@ Question.exam_session = relationship("ExamSession", back_populates="questions")
 
 class ExamAttempt(Base):
     __tablename__ = "exam_attempts"
+    __table_args__ = (
+        # Hot-path filters; keep in sync with migrations.py
+        Index("ix_exam_attempts_exam_end", "exam_session_id", "end_time"),
+        Index("ix_exam_attempts_user_exam_end", "user_id", "exam_session_id", "end_time"),
+        Index("ix_exam_attempts_alt_tab_start", "alt_tab_count", "start_time"),
+        Index("ix_exam_attempts_exam_start", "exam_session_id", "start_time", "id"),
+        Index("ix_exam_attempts_user_start", "user_id", "start_time", "id"),
+        Index("ix_exam_attempts_start", "start_time", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -58,15 +76,35 @@ class ExamAttempt(Base):
     end_time = Column(DateTime, nullable=True)
     # Fields used throughout the app
     alt_tab_count = Column(Integer, default=0)
-    answered_questions = Column(JSON, default=list)  # stored as JSON/TEXT in SQLite
+    # Legacy JSON answer log (stored as JSON/TEXT in SQLite); new answers live in the answers table
+    legacy_answered_questions = Column("answered_questions", JSON, default=list)
     duration_seconds = Column(Integer, nullable=True)
     average_time_per_question_seconds = Column(Float, nullable=True)
     status = Column(String, default="in_progress")  # in_progress, completed, abandoned
     violations_count = Column(Integer, default=0)
+    # Running counters maintained by submit_answer (see scoring.py)
+    answers_count = Column(Integer, default=0)
+    correct_answers = Column(Integer, default=0)
+    points_earned = Column(Integer, default=0)
+    total_time_seconds = Column(Float, default=0)
+    # Folded into item_stats (see item_analysis.py)
+    item_stats_applied = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     user = relationship("User", back_populates="attempts")
     exam_session = relationship("ExamSession", back_populates="attempts")
+    answers = relationship("Answer", back_populates="exam_attempt", order_by="Answer.id")
+
+    @property
+    def answered_questions(self):
+        """Answer log in the legacy JSON shape: old JSON entries followed by answers rows"""
+        legacy = self.legacy_answered_questions or []
+        if isinstance(legacy, str):
+            try:
+                legacy = json.loads(legacy)
+            except ValueError:
+                legacy = []
+        return list(legacy) + [answer.to_dict() for answer in self.answers]
 
 class Violation(Base):
     __tablename__ = "violations"
@@ -79,11 +117,61 @@ class Violation(Base):
 
 class Answer(Base):
     __tablename__ = "answers"
+    __table_args__ = (
+        # One answer per question per attempt; re-submitting overwrites the row
+        Index("uq_answers_attempt_question", "exam_attempt_id", "question_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     exam_attempt_id = Column(Integer, ForeignKey("exam_attempts.id"))
     question_id = Column(Integer, ForeignKey("questions.id"))
     selected_answer = Column(String, nullable=False)
+    correct_answer = Column(String, nullable=True)  # snapshot at submission time
     is_correct = Column(Boolean, default=False)
     time_taken_seconds = Column(Float, nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow) 
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    exam_attempt = relationship("ExamAttempt", back_populates="answers")
+
+    def to_dict(self):
+        """Serialize in the same shape as the legacy answered_questions entries"""
+        time_taken = self.time_taken_seconds
+        if time_taken is not None and float(time_taken).is_integer():
+            time_taken = int(time_taken)
+        return {
+            "question_id": self.question_id,
+            "user_answer": self.selected_answer,
+            "correct_answer": self.correct_answer,
+            "is_correct": bool(self.is_correct),
+            "time_taken_seconds": time_taken,
+        } 
+
+class ItemStat(Base):
+    """Running per-question sums for item analysis, updated as attempts complete"""
+    __tablename__ = "item_stats"
+
+    exam_session_id = Column(Integer, ForeignKey("exam_sessions.id"), primary_key=True)
+    question_id = Column(Integer, primary_key=True)
+    questions_version = Column(Integer, default=0)  # exam questions_content_version the sums were built against
+    responses = Column(Integer, default=0)
+    correct = Column(Integer, default=0)
+    # Sums over responding attempts of the attempt total (y), y^2 and y where this item was correct
+    sum_total = Column(Float, default=0)
+    sum_total_sq = Column(Float, default=0)
+    sum_correct_total = Column(Float, default=0)
+    option_counts = Column(JSON, default=dict)
+    time_count = Column(Integer, default=0)
+    time_sum = Column(Float, default=0)
+    time_histogram = Column(JSON, default=list)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ExamStat(Base):
+    """Per-exam attempt counters kept in step with the attempt writes (see exam_stats.py)"""
+    __tablename__ = "exam_stats"
+
+    exam_session_id = Column(Integer, primary_key=True, autoincrement=False)  # 0: attempts without an exam
+    participants = Column(Integer, default=0)
+    active = Column(Integer, default=0)
+    completed = Column(Integer, default=0)
+    violations = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,101 @@
+"""Sparse ordering keys for questions within an exam.
+
+``Question.order_index`` values are spaced ``ORDER_GAP`` apart, so moving one
+question only rewrites that question's key: it takes the midpoint between its
+new neighbours. When two neighbours have no integer left between them the
+exam is rebalanced, re-spacing every key in one executemany UPDATE.
+"""
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+import models
+
+ORDER_GAP = 1024
+
+# Order questions are shown in; rows without a key (legacy data) go last
+QUESTION_ORDER = (
+    models.Question.order_index.asc().nulls_last(),
+    models.Question.created_at.asc(),
+    models.Question.id.asc(),
+)
+
+
+def next_order_key(db: Session, exam_id: int):
+    """Key for a question appended to the end of the exam"""
+    max_order = db.query(func.max(models.Question.order_index)).filter(
+        models.Question.exam_session_id == exam_id
+    ).scalar()
+    return (max_order or 0) + ORDER_GAP
+
+
+def set_order(db: Session, question_ids):
+    """Give ``question_ids`` evenly spaced keys in the listed order (one executemany UPDATE)"""
+    if not question_ids:
+        return
+    db.execute(
+        update(models.Question),
+        [{"id": qid, "order_index": position * ORDER_GAP} for position, qid in enumerate(question_ids, start=1)],
+    )
+
+
+def rebalance(db: Session, exam_id: int):
+    """Re-space all keys of an exam, keeping the current order"""
+    ids = [row.id for row in db.query(models.Question.id).filter(
+        models.Question.exam_session_id == exam_id
+    ).order_by(*QUESTION_ORDER)]
+    set_order(db, ids)
+    return len(ids)
+
+
+def _neighbour_keys(db: Session, exam_id: int, question_id: int, after_id=None, before_id=None):
+    """(lower, upper) keys the moved question must fit between; upper is None at the end"""
+    question = models.Question
+    others = db.query(question.order_index).filter(
+        question.exam_session_id == exam_id, question.id != question_id
+    )
+    if after_id is not None:
+        lower = db.query(question.order_index).filter(
+            question.id == after_id, question.exam_session_id == exam_id
+        ).scalar()
+        if lower is None:
+            return None
+        upper = others.filter(question.order_index > lower).with_entities(func.min(question.order_index)).scalar()
+        return lower, upper
+    if before_id is not None:
+        upper = db.query(question.order_index).filter(
+            question.id == before_id, question.exam_session_id == exam_id
+        ).scalar()
+        if upper is None:
+            return None
+        lower = others.filter(question.order_index < upper).with_entities(func.max(question.order_index)).scalar()
+        return lower or 0, upper
+    # Neither given: move to the end
+    return others.with_entities(func.max(question.order_index)).scalar() or 0, None
+
+
+def move_question(db: Session, exam_id: int, question_id: int, after_id=None, before_id=None):
+    """Place one question after ``after_id`` / before ``before_id`` (or last if neither).
+
+    Usually a single-row UPDATE; rebalances the exam first when the neighbours
+    are adjacent or legacy rows have no key. Returns the new key, or None when
+    a referenced question is not in the exam.
+    """
+    unkeyed = db.query(models.Question.id).filter(
+        models.Question.exam_session_id == exam_id, models.Question.order_index.is_(None)
+    ).first()
+    if unkeyed is not None:
+        rebalance(db, exam_id)
+
+    bounds = _neighbour_keys(db, exam_id, question_id, after_id, before_id)
+    if bounds is None:
+        return None
+    lower, upper = bounds
+    if upper is not None and upper - lower < 2:
+        rebalance(db, exam_id)
+        lower, upper = _neighbour_keys(db, exam_id, question_id, after_id, before_id)
+
+    key = lower + ORDER_GAP if upper is None else (lower + upper) // 2
+    db.query(models.Question).filter(models.Question.id == question_id).update(
+        {models.Question.order_index: key}, synchronize_session=False
+    )
+    return key
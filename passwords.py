@@ -0,0 +1,127 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from passlib.context import CryptContext
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+# bcrypt cost factor; each +1 doubles the CPU time per hash (12 is about 250 ms)
+BCRYPT_ROUNDS = _env_int("BCRYPT_ROUNDS", 12)
+# Worker processes for hashing (0 runs it on the default threadpool instead)
+PASSWORD_HASH_WORKERS = _env_int("PASSWORD_HASH_WORKERS", min(2, os.cpu_count() or 1))
+# Hash/verify calls allowed to wait or run at once; beyond this callers get PasswordPoolBusy
+PASSWORD_HASH_MAX_PENDING = _env_int("PASSWORD_HASH_MAX_PENDING", 32)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+def hash_password(password):
+    return pwd_context.hash(password)
+
+
+def check_password(password, hashed_password):
+    return pwd_context.verify(password, hashed_password)
+
+
+def _timed(func, *args):
+    """Runs in the worker: returns the result and the wall-clock time the work started"""
+    started = time.time()
+    return func(*args), started
+
+
+class PasswordPoolBusy(Exception):
+    """Too many hash/verify calls are already queued"""
+
+
+class PasswordPool:
+    """Bounded process pool for bcrypt, so hashing never holds the GIL of the web workers.
+
+    Calls beyond ``max_pending`` are rejected straight away instead of queueing
+    behind a login burst; the caller turns that into a 503 with Retry-After.
+    """
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None and self.workers > 0:
+                # spawn: forking a process that already runs threads (logging, event loop) is unsafe.
+                # Spawned workers re-import __main__, so start the app through a cheap
+                # entry point (uvicorn main:app, serve.py), never python main.py
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy()
+            self.pending += 1
+        submitted = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            try:
+                result, started = await loop.run_in_executor(self._get_executor(), _timed, func, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); start a fresh pool and retry once
+                with self._lock:
+                    self._executor = None
+                result, started = await loop.run_in_executor(self._get_executor(), _timed, func, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+        finished = time.time()
+        with self._lock:
+            self.completed += 1
+            self.wait_seconds += max(started - submitted, 0.0)
+            self.run_seconds += max(finished - started, 0.0)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds": self.wait_seconds,
+                "run_seconds": self.run_seconds,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+pool = PasswordPool()
+
+
+async def hash_password_async(password):
+    return await pool.run(hash_password, password)
+
+
+async def check_password_async(password, hashed_password):
+    return await pool.run(check_password, password, hashed_password)
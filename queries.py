@@ -0,0 +1,182 @@
+import base64
+import datetime
+import json
+
+from sqlalchemy import and_, func, or_, tuple_
+from sqlalchemy.orm import Session
+
+import models
+
+# Columns the host dashboard needs from an attempt and its user; the answer
+# log (legacy JSON or answers rows) is deliberately left out.
+ATTEMPT_USER_COLUMNS = (
+    models.ExamAttempt.id.label("id"),
+    models.ExamAttempt.user_id.label("user_id"),
+    models.ExamAttempt.exam_session_id.label("exam_session_id"),
+    models.ExamAttempt.start_time.label("start_time"),
+    models.ExamAttempt.end_time.label("end_time"),
+    models.ExamAttempt.score.label("score"),
+    models.ExamAttempt.alt_tab_count.label("alt_tab_count"),
+    models.ExamAttempt.duration_seconds.label("duration_seconds"),
+    models.ExamAttempt.average_time_per_question_seconds.label("average_time_per_question_seconds"),
+    models.ExamAttempt.answers_count.label("answers_count"),
+    models.User.name.label("user_name"),
+    models.User.email.label("user_email"),
+)
+
+
+def attempts_with_users(db: Session, *filters, order_by=None, limit=None, include_orphans=False):
+    """Fetch attempts joined to their users in a single statement.
+
+    Rows expose the labels in ATTEMPT_USER_COLUMNS. Attempts whose user no
+    longer exists are skipped unless ``include_orphans`` is set, in which case
+    ``user_name``/``user_email`` are None.
+    """
+    query = db.query(*ATTEMPT_USER_COLUMNS)
+    if include_orphans:
+        query = query.outerjoin(models.User, models.User.id == models.ExamAttempt.user_id)
+    else:
+        query = query.join(models.User, models.User.id == models.ExamAttempt.user_id)
+    if filters:
+        query = query.filter(*filters)
+    if order_by is not None:
+        query = query.order_by(*order_by) if isinstance(order_by, tuple) else query.order_by(order_by)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+# Sortable attempt columns for the paginated lists; ties are broken by id.
+# Nullable numbers sort as 0 so the keyset comparison never meets a NULL.
+ATTEMPT_SORT_KEYS = {
+    "start_time": models.ExamAttempt.start_time,
+    "score": func.coalesce(models.ExamAttempt.score, 0),
+    "alt_tab_count": func.coalesce(models.ExamAttempt.alt_tab_count, 0),
+    "violations": func.coalesce(models.ExamAttempt.alt_tab_count, 0),
+    "average_time_per_question_seconds": func.coalesce(models.ExamAttempt.average_time_per_question_seconds, 0),
+    "duration_seconds": func.coalesce(models.ExamAttempt.duration_seconds, 0),
+}
+ATTEMPT_PAGE_MAX = 500
+
+
+def encode_cursor(sort, value, attempt_id):
+    if isinstance(value, datetime.datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, attempt_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    """(sort value, attempt id) from a cursor made by encode_cursor; ValueError if it does not fit ``sort``"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, attempt_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if cursor_sort != sort or not isinstance(attempt_id, int):
+        raise ValueError("Cursor does not match the requested sort")
+    if sort == "start_time" and value is not None:
+        value = datetime.datetime.fromisoformat(value)
+    return value, attempt_id
+
+
+def attempt_filters(status=None, min_score=None, max_score=None, min_violations=None, max_violations=None):
+    attempt = models.ExamAttempt
+    filters = []
+    if status == "completed":
+        filters.append(attempt.end_time.isnot(None))
+    elif status == "in_progress":
+        filters.append(attempt.end_time.is_(None))
+    elif status is not None:
+        raise ValueError("status must be completed or in_progress")
+    if min_score is not None:
+        filters.append(func.coalesce(attempt.score, 0) >= min_score)
+    if max_score is not None:
+        filters.append(func.coalesce(attempt.score, 0) <= max_score)
+    if min_violations is not None:
+        filters.append(func.coalesce(attempt.alt_tab_count, 0) >= min_violations)
+    if max_violations is not None:
+        filters.append(func.coalesce(attempt.alt_tab_count, 0) <= max_violations)
+    return filters
+
+
+def _after_cursor(key, value, last_id, direction):
+    """Rows that follow (value, last_id) in attempt_page order, where NULL keys sort lowest"""
+    attempt_id = models.ExamAttempt.id
+    if value is None:
+        if direction == "desc":
+            return and_(key.is_(None), attempt_id < last_id)
+        return or_(key.isnot(None), and_(key.is_(None), attempt_id > last_id))
+    position = tuple_(key, attempt_id)
+    if direction == "desc":
+        return or_(position < tuple_(value, last_id), key.is_(None))
+    return position > tuple_(value, last_id)
+
+
+def attempt_page(db: Session, *filters, sort="start_time", direction="desc", cursor=None, limit=50,
+                 include_orphans=False):
+    """One keyset page of attempts (ATTEMPT_USER_COLUMNS rows) ordered by (sort key, id).
+
+    Returns (rows, next_cursor); next_cursor is None on the last page. Raises
+    ValueError for an unknown sort, direction or a malformed cursor.
+    """
+    key = ATTEMPT_SORT_KEYS.get(sort)
+    if key is None:
+        raise ValueError(f"sort must be one of: {', '.join(ATTEMPT_SORT_KEYS)}")
+    if direction not in ("asc", "desc"):
+        raise ValueError("direction must be asc or desc")
+    limit = max(1, min(limit, ATTEMPT_PAGE_MAX))
+    attempt_id = models.ExamAttempt.id
+
+    conditions = list(filters)
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        conditions.append(_after_cursor(key, value, last_id, direction))
+    # NULL keys (start_time) sort as the smallest values on every backend
+    if direction == "desc":
+        order_by = (key.desc().nulls_last(), attempt_id.desc())
+    else:
+        order_by = (key.asc().nulls_first(), attempt_id.asc())
+
+    # One extra row tells whether another page follows
+    rows = attempts_with_users(db, *conditions, order_by=order_by, limit=limit + 1, include_orphans=include_orphans)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    if sort == "start_time":
+        sort_value = last.start_time
+    else:
+        sort_value = getattr(last, "alt_tab_count" if sort == "violations" else sort) or 0
+    return rows, encode_cursor(sort, sort_value, last.id)
+
+
+def exam_catalog(db: Session, now):
+    """Non-expired exams with their question and attempt counts, in one grouped statement"""
+    question_counts = db.query(
+        models.Question.exam_session_id.label("exam_id"),
+        func.count(models.Question.id).label("question_count")
+    ).group_by(models.Question.exam_session_id).subquery()
+    attempt_counts = db.query(
+        models.ExamAttempt.exam_session_id.label("exam_id"),
+        func.count(models.ExamAttempt.id).label("participant_count")
+    ).group_by(models.ExamAttempt.exam_session_id).subquery()
+
+    return db.query(
+        models.ExamSession.id,
+        models.ExamSession.title,
+        models.ExamSession.description,
+        models.ExamSession.duration_minutes,
+        models.ExamSession.status,
+        models.ExamSession.start_date,
+        models.ExamSession.end_date,
+        func.coalesce(question_counts.c.question_count, 0).label("question_count"),
+        func.coalesce(attempt_counts.c.participant_count, 0).label("participant_count"),
+    ).outerjoin(
+        question_counts, question_counts.c.exam_id == models.ExamSession.id
+    ).outerjoin(
+        attempt_counts, attempt_counts.c.exam_id == models.ExamSession.id
+    ).filter(
+        (models.ExamSession.end_date.is_(None)) |  # No end date (always valid)
+        (models.ExamSession.end_date > now)  # End date in the future
+    ).order_by(models.ExamSession.id).all()
@@ -0,0 +1,52 @@
+import random
+from sqlalchemy.orm import Session
+
+import cache
+import models
+
+# Sorted tuples of eligible question IDs, keyed by pool ("all" or an exam id)
+question_id_cache = cache.TTLCache(maxsize=256)
+
+
+@cache.on_table_change("questions")
+def invalidate_question_ids(table_name):
+    question_id_cache.invalidate()
+
+
+def pool_key(exam_id=None):
+    return "all" if exam_id is None else f"exam:{exam_id}"
+
+
+def eligible_question_ids(db: Session, exam_id=None):
+    """IDs of the questions a draw can pick from, loaded once per pool and cached"""
+    key = pool_key(exam_id)
+    ids = question_id_cache.get(key)
+    if ids is None:
+        query = db.query(models.Question.id)
+        if exam_id is not None:
+            query = query.filter(models.Question.exam_session_id == exam_id)
+        ids = tuple(sorted(row[0] for row in query))
+        question_id_cache.set(key, ids)
+    return ids
+
+
+def draw_question_ids(db: Session, count: int, exam_id=None, seed=None):
+    """Pick ``count`` question IDs from the pool.
+
+    With a ``seed`` (e.g. the attempt id) the draw is deterministic, so a
+    resumed attempt gets the same paper back as long as the pool is unchanged.
+    """
+    ids = eligible_question_ids(db, exam_id)
+    if len(ids) <= count:
+        return list(ids)
+    rng = random.Random(f"{pool_key(exam_id)}:{seed}") if seed is not None else random
+    return rng.sample(ids, count)
+
+
+def fetch_questions(db: Session, question_ids):
+    """Load only the drawn rows, returned in draw order"""
+    if not question_ids:
+        return []
+    rows = db.query(models.Question).filter(models.Question.id.in_(question_ids)).all()
+    by_id = {q.id: q for q in rows}
+    return [by_id[qid] for qid in question_ids if qid in by_id]
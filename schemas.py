@@ -88,10 +88,36 @@ class ExamAttempt(ExamAttemptBase):
     answered_questions: Optional[Any] = None
     duration_seconds: Optional[int] = None
     average_time_per_question_seconds: Optional[float] = None
+    answers_count: Optional[int] = 0
+    correct_answers: Optional[int] = 0
+    points_earned: Optional[int] = 0
+    total_time_seconds: Optional[float] = 0
 
     class Config:
         from_attributes = True
 
+# Paginated attempt lists (no answer log)
+class AttemptSummary(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    exam_session_id: Optional[int] = None
+    user_name: str
+    user_email: str
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    duration_seconds: Optional[int] = None
+    alt_tab_count: int = 0
+    score: Optional[float] = None
+    answers_count: int = 0
+    total_questions: int = 0
+    average_time_per_question_seconds: Optional[float] = None
+    status: str
+
+class AttemptPage(BaseModel):
+    items: List[AttemptSummary]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
 # Violation schemas
 class ViolationBase(BaseModel):
     exam_attempt_id: int
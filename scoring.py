@@ -0,0 +1,146 @@
+import datetime
+import json
+from sqlalchemy import func, case, update
+from sqlalchemy.orm import Session
+
+import models
+
+
+def question_points(question):
+    """Points a question is worth (unset points count as 1)"""
+    return question.points if question.points is not None else 1
+
+
+def answer_counter_update(attempt_id: int, question, is_correct: bool, time_taken_seconds, previous=None):
+    """Single atomic UPDATE adding one answer to the attempt's running counters.
+
+    ``previous`` is the answer being overwritten, if any; its contribution is
+    subtracted so re-answering a question does not double count it. Only
+    matches attempts that have not ended: a rowcount of 0 means the answer
+    came in too late. Works with both the sync and the async session.
+    """
+    points = question_points(question)
+    answers_delta = 1
+    correct_delta = 1 if is_correct else 0
+    time_delta = time_taken_seconds or 0
+    if previous is not None:
+        answers_delta = 0
+        correct_delta -= 1 if previous.is_correct else 0
+        time_delta -= previous.time_taken_seconds or 0
+
+    attempt = models.ExamAttempt
+    return update(attempt).where(attempt.id == attempt_id, attempt.end_time.is_(None)).values({
+        attempt.answers_count: func.coalesce(attempt.answers_count, 0) + answers_delta,
+        attempt.correct_answers: func.coalesce(attempt.correct_answers, 0) + correct_delta,
+        attempt.points_earned: func.coalesce(attempt.points_earned, 0) + correct_delta * points,
+        attempt.total_time_seconds: func.coalesce(attempt.total_time_seconds, 0) + time_delta,
+    }).execution_options(synchronize_session=False)
+
+
+def close_attempt_statement(attempt_id: int, end_time):
+    """UPDATE setting end_time only while the attempt is still open.
+
+    Its rowcount is 1 for the one caller that actually ended the attempt, so
+    concurrent enders (end_exam, a violation flush) never both count it.
+    """
+    attempt = models.ExamAttempt
+    return update(attempt).where(attempt.id == attempt_id, attempt.end_time.is_(None)).values(
+        end_time=end_time
+    ).execution_options(synchronize_session=False)
+
+
+def finalize_attempt(exam_attempt, end_time=None):
+    """Close an attempt using its running counters (no rescan of the answers)"""
+    exam_attempt.end_time = end_time or datetime.datetime.utcnow()
+    exam_attempt.duration_seconds = int((exam_attempt.end_time - exam_attempt.start_time).total_seconds())
+    exam_attempt.score = exam_attempt.points_earned or 0
+    answers_count = exam_attempt.answers_count or 0
+    if answers_count > 0:
+        exam_attempt.average_time_per_question_seconds = (exam_attempt.total_time_seconds or 0) / answers_count
+    else:
+        exam_attempt.average_time_per_question_seconds = 0
+
+
+def legacy_entries(value):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return value or []
+
+
+def verify_attempt_counters(db: Session, attempt_ids=None, repair=False):
+    """Recompute the running counters from source answers and report any drift.
+
+    Answers rows are aggregated in one grouped query; legacy JSON answer logs
+    are folded in on top. Returns a list of ``{"attempt_id", "stored",
+    "expected"}`` dicts for mismatching attempts, and rewrites the counters
+    in bulk when ``repair`` is set.
+    """
+    answer = models.Answer
+    question = models.Question
+    attempt = models.ExamAttempt
+    points = func.coalesce(question.points, 1)
+
+    totals = db.query(
+        answer.exam_attempt_id,
+        func.count(answer.id),
+        func.sum(case((answer.is_correct, 1), else_=0)),
+        func.sum(case((answer.is_correct, points), else_=0)),
+        func.sum(func.coalesce(answer.time_taken_seconds, 0)),
+    ).outerjoin(question, question.id == answer.question_id).group_by(answer.exam_attempt_id)
+    if attempt_ids is not None:
+        totals = totals.filter(answer.exam_attempt_id.in_(attempt_ids))
+    expected = {
+        row[0]: [row[1] or 0, row[2] or 0, row[3] or 0, float(row[4] or 0)]
+        for row in totals
+    }
+
+    attempts = db.query(
+        attempt.id,
+        attempt.legacy_answered_questions,
+        attempt.answers_count,
+        attempt.correct_answers,
+        attempt.points_earned,
+        attempt.total_time_seconds,
+    )
+    if attempt_ids is not None:
+        attempts = attempts.filter(attempt.id.in_(attempt_ids))
+    attempts = attempts.all()
+
+    legacy_question_ids = {
+        entry.get("question_id")
+        for row in attempts
+        for entry in legacy_entries(row[1])
+    }
+    legacy_points = {}
+    if legacy_question_ids:
+        legacy_points = dict(
+            db.query(question.id, points).filter(question.id.in_(legacy_question_ids)).all()
+        )
+
+    mismatches = []
+    for row in attempts:
+        values = expected.get(row[0], [0, 0, 0, 0.0])
+        for entry in legacy_entries(row[1]):
+            values[0] += 1
+            if entry.get("is_correct"):
+                values[1] += 1
+                values[2] += legacy_points.get(entry.get("question_id"), 1)
+            values[3] += float(entry.get("time_taken_seconds") or 0)
+
+        stored = [row[2] or 0, row[3] or 0, row[4] or 0, float(row[5] or 0)]
+        if stored[:3] != values[:3] or abs(stored[3] - values[3]) > 1e-6:
+            mismatches.append({
+                "attempt_id": row[0],
+                "stored": dict(zip(("answers_count", "correct_answers", "points_earned", "total_time_seconds"), stored)),
+                "expected": dict(zip(("answers_count", "correct_answers", "points_earned", "total_time_seconds"), values)),
+            })
+
+    if repair and mismatches:
+        db.bulk_update_mappings(attempt, [
+            {"id": item["attempt_id"], **item["expected"]} for item in mismatches
+        ])
+        db.commit()
+    return mismatches
@@ -0,0 +1,13 @@
+"""Run the app directly: ``python serve.py``
+
+The password hashing workers are spawned processes, and each one re-imports
+the parent's ``__main__`` module; this launcher keeps that import cheap
+(``python main.py`` would rebuild the whole app, DB engines included, in
+every worker). uvicorn imports ``main`` by name instead.
+"""
+import os
+
+import uvicorn
+
+if __name__ == "__main__":
+    uvicorn.run("main:app", host=os.getenv("HOST", "127.0.0.1"), port=int(os.getenv("PORT", "8000")))
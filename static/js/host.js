@@ -196,31 +196,31 @@ class HostDashboard {
             return;
         }
 
-        let successCount = 0;
-        let errorCount = 0;
-
-        for (const question of questions) {
-            try {
-                const formData = new FormData();
-                formData.append('text', question.text);
-                formData.append('correct_answer', question.correct_answer);
-                formData.append('points', question.points || '1');
-                formData.append('exam_id', this.currentExamId);
-                formData.append('options', JSON.stringify(question.options));
-
-                const response = await fetch('/api/create_question', {
-                    method: 'POST',
-                    body: formData
-                });
+        // One request: the questions go to the bulk import endpoint as a JSONL file
+        const jsonl = questions.map(question => JSON.stringify({
+            text: question.text,
+            options: question.options,
+            correct_answer: question.correct_answer,
+            points: question.points
+        })).join('\n');
+        const formData = new FormData();
+        formData.append('file', new Blob([jsonl], { type: 'application/x-ndjson' }), 'questions.jsonl');
+        formData.append('file_format', 'jsonl');
 
-                if (response.ok) {
-                    successCount++;
-                } else {
-                    errorCount++;
-                }
-            } catch (error) {
-                errorCount++;
+        let successCount = 0;
+        let errorCount = questions.length;
+        try {
+            const response = await fetch(`/api/exam/${this.currentExamId}/import_questions`, {
+                method: 'POST',
+                body: formData
+            });
+            if (response.ok) {
+                const result = await response.json();
+                successCount = result.imported;
+                errorCount = result.failed;
             }
+        } catch (error) {
+            console.error('Bulk import failed:', error);
         }
 
         if (successCount > 0) {
@@ -366,7 +366,7 @@ class HostDashboard {
         }).join('');
         div.innerHTML = `
             <div class="question-header">
-                <span class="question-number">#${question.order_index || number}</span>
+                <span class="question-number">#${question.position || number}</span>
                 <span class="question-points">${question.points} pts</span>
             </div>
             <div class="question-text">${question.text}</div>
@@ -503,16 +503,20 @@ class HostDashboard {
         if (moved) {
             // apply locally for instant feedback
             const idToQuestion = new Map(this.questionsCache.map(q => [q.id, q]));
-            this.questionsCache = newOrder.map((id, i) => ({ ...idToQuestion.get(id), order_index: i + 1 }));
+            this.questionsCache = newOrder.map((id, i) => ({ ...idToQuestion.get(id), position: i + 1 }));
             this.renderQuestions(this.questionsCache);
             
-            // sync to server
+            // sync to server: only the moved question's order key changes
+            const newIdx = newOrder.indexOf(questionId);
+            const move = newIdx > 0
+                ? { question_id: questionId, after_id: newOrder[newIdx - 1] }
+                : { question_id: questionId, before_id: newOrder[1] };
             try {
-                console.log('Sending reorder request to server...');
-                const r = await fetch(`/api/exam/${examId}/reorder`, {
+                console.log('Sending move request to server...');
+                const r = await fetch(`/api/exam/${examId}/move_questions`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ order: newOrder })
+                    body: JSON.stringify({ moves: [move] })
                 });
                 
                 if (!r.ok) {
@@ -542,11 +546,18 @@ class HostDashboard {
         }
     }
 
-    async loadAllExamAttempts() {
+    async loadAllExamAttempts(append = false) {
         try {
-            const response = await fetch('/get_all_exam_attempts');
-            const attempts = await response.json();
-            this.renderExamHistory(attempts);
+            // One page at a time; "Load more" follows the server's cursor
+            const params = new URLSearchParams({ limit: 100 });
+            if (append && this.examHistoryCursor) {
+                params.set('cursor', this.examHistoryCursor);
+            }
+            const response = await fetch(`/get_all_exam_attempts?${params}`);
+            const page = await response.json();
+            this.examHistory = append ? (this.examHistory || []).concat(page.items) : page.items;
+            this.examHistoryCursor = page.next_cursor;
+            this.renderExamHistory(this.examHistory);
         } catch (error) {
             console.error('Error loading exam attempts:', error);
         }
@@ -572,7 +583,7 @@ class HostDashboard {
                 <div class="exam-attempt-card">
                     <div class="attempt-header">
                         <h3>Attempt #${attempt.id}</h3>
-                        <span class="attempt-score">Score: ${attempt.score || 0}/${attempt.answered_questions?.length || 0}</span>
+                        <span class="attempt-score">Score: ${attempt.score || 0}/${attempt.answers_count || 0}</span>
                     </div>
                     <div class="attempt-details">
                         <p><strong>User ID:</strong> ${attempt.user_id}</p>
@@ -601,6 +612,10 @@ class HostDashboard {
             <div class="exam-attempts-grid">
                 ${attemptsHtml}
             </div>
+            ${this.examHistoryCursor ? `
+                <button onclick="hostDashboard.loadAllExamAttempts(true)" class="btn btn-secondary">
+                    <i class="fas fa-chevron-down"></i> Load more
+                </button>` : ''}
         `;
     }
 
@@ -741,6 +756,9 @@ class HostDashboard {
     async exportResults(examId) {
         try {
             const response = await fetch(`/api/exam/${examId}/export`);
+            if (!response.ok) {
+                throw new Error(`Export failed (${response.status})`);
+            }
             const blob = await response.blob();
             
             const url = window.URL.createObjectURL(blob);
@@ -780,13 +798,22 @@ class HostDashboard {
         }
     }
 
-    async viewExamAttempts(examId) {
+    async viewExamAttempts(examId, append = false) {
+        const attemptsContainer = document.getElementById('exam-attempts-container');
         try {
-            const response = await fetch(`/api/exam/${examId}/attempts`);
-            const attempts = await response.json();
-            const attemptsContainer = document.getElementById('exam-attempts-container');
-            attemptsContainer.innerHTML = '';
-            if (!attempts.length) {
+            // One page at a time; "Load more" follows the server's cursor
+            const params = new URLSearchParams({ limit: 100 });
+            if (append && this.examAttemptsCursor) {
+                params.set('cursor', this.examAttemptsCursor);
+            }
+            const response = await fetch(`/api/exam/${examId}/attempts?${params}`);
+            const page = await response.json();
+            const attempts = page.items || [];
+            this.examAttemptsCursor = page.next_cursor;
+            const loadMore = document.getElementById('exam-attempts-load-more');
+            if (loadMore) loadMore.remove();
+            if (!append) attemptsContainer.innerHTML = '';
+            if (!append && !attempts.length) {
                 attemptsContainer.innerHTML = '<div>No attempts for this exam yet.</div>';
                 return;
             }
@@ -795,7 +822,7 @@ class HostDashboard {
                 div.className = 'exam-attempt-card';
                 div.innerHTML = `
                     <div class="attempt-header">
-                        <span><b>${attempt.username || 'Unknown User'}</b> (${attempt.email || ''})</span>
+                        <span><b>${attempt.user_name || 'Unknown User'}</b> (${attempt.user_email || ''})</span>
                         <span>Score: ${attempt.score} / ${attempt.total_questions}</span>
                     </div>
                     <div>Start: ${attempt.start_time ? new Date(attempt.start_time).toLocaleString() : 'N/A'}</div>
@@ -804,8 +831,15 @@ class HostDashboard {
                 `;
                 attemptsContainer.appendChild(div);
             });
+            if (this.examAttemptsCursor) {
+                const button = document.createElement('button');
+                button.id = 'exam-attempts-load-more';
+                button.className = 'btn btn-secondary';
+                button.innerHTML = '<i class="fas fa-chevron-down"></i> Load more';
+                button.onclick = () => this.viewExamAttempts(examId, true);
+                attemptsContainer.appendChild(button);
+            }
         } catch (error) {
-            const attemptsContainer = document.getElementById('exam-attempts-container');
             attemptsContainer.innerHTML = '<div>Error loading attempts.</div>';
         }
     }
@@ -893,6 +927,42 @@ class HostDashboard {
     }
 
     startRealTimeUpdates() {
+        // Prefer server-pushed events; only refresh what an event can have changed
+        // The stream needs the host's token; EventSource cannot send headers, so it goes in the URL
+        const token = localStorage.getItem('token');
+        if (window.EventSource && token) {
+            this.updateStats();
+            this.updateParticipants();
+            this.updateViolations();
+            const source = new EventSource(`/api/events?access_token=${encodeURIComponent(token)}`);
+            const pending = new Set();
+            let timer = null;
+            const schedule = (...updates) => {
+                updates.forEach(update => pending.add(update));
+                if (timer) return;
+                // Coalesce bursts of events into one refresh per second
+                timer = setTimeout(() => {
+                    timer = null;
+                    pending.forEach(update => this[update]());
+                    pending.clear();
+                }, 1000);
+            };
+            source.addEventListener('attempt_started', () => schedule('updateStats', 'updateParticipants'));
+            source.addEventListener('answer_submitted', () => schedule('updateParticipants'));
+            source.addEventListener('attempt_completed', () => schedule('updateStats', 'updateParticipants'));
+            source.addEventListener('violation', () => schedule('updateStats', 'updateViolations'));
+            source.addEventListener('native_violation', () => schedule('updateViolations'));
+            source.onerror = () => {
+                if (source.readyState === EventSource.CLOSED) {
+                    this.startPolling();
+                }
+            };
+            return;
+        }
+        this.startPolling();
+    }
+
+    startPolling() {
         // Update stats every 5 seconds
         setInterval(() => {
             this.updateStats();
@@ -476,18 +476,57 @@
     }
   }
 
+  // Live updates: refresh when the server pushes an exam event (SSE),
+  // falling back to polling when EventSource is unavailable or keeps failing
+  let activityEvents = null;
+  let activityRefreshTimer = null;
+
+  function refreshActivity() {
+    updateActivityStats();
+    const activeTab = el('.tab-btn.active');
+    if (activeTab) {
+      loadTabData(activeTab.dataset.tab);
+    }
+  }
+
+  function scheduleActivityRefresh() {
+    // Coalesce bursts of events (e.g. many candidates starting at once) into one refresh
+    if (activityRefreshTimer) return;
+    activityRefreshTimer = setTimeout(() => {
+      activityRefreshTimer = null;
+      refreshActivity();
+    }, 1000);
+  }
+
   function startActivityPolling() {
-    if (activityInterval) clearInterval(activityInterval);
-    activityInterval = setInterval(() => {
-      updateActivityStats();
-      const activeTab = el('.tab-btn.active');
-      if (activeTab) {
-        loadTabData(activeTab.dataset.tab);
-      }
-    }, 5000); // Update every 5 seconds
+    stopActivityPolling();
+    // The stream needs the host's token; EventSource cannot send headers, so it goes in the URL
+    const token = localStorage.getItem('token');
+    if (window.EventSource && token) {
+      activityEvents = new EventSource(`/api/exam/${currentExamId}/events?access_token=${encodeURIComponent(token)}`);
+      ['attempt_started', 'answer_submitted', 'attempt_completed', 'violation'].forEach(type => {
+        activityEvents.addEventListener(type, scheduleActivityRefresh);
+      });
+      activityEvents.onerror = () => {
+        if (activityEvents && activityEvents.readyState === EventSource.CLOSED) {
+          activityEvents = null;
+          activityInterval = setInterval(refreshActivity, 5000);
+        }
+      };
+      return;
+    }
+    activityInterval = setInterval(refreshActivity, 5000); // Update every 5 seconds
   }
 
   function stopActivityPolling() {
+    if (activityEvents) {
+      activityEvents.close();
+      activityEvents = null;
+    }
+    if (activityRefreshTimer) {
+      clearTimeout(activityRefreshTimer);
+      activityRefreshTimer = null;
+    }
     if (activityInterval) {
       clearInterval(activityInterval);
       activityInterval = null;
@@ -59,6 +59,12 @@ async function displayResults(results) {
         }
     }
     
+    // Percentage is based on the number of correct answers (score is weighted by question points)
+    let correctCount = results.correct_answers;
+    if (correctCount === null || correctCount === undefined) {
+        correctCount = answeredQuestions.filter(q => q.is_correct).length;
+    }
+    
     // Calculate average time if not already calculated
     let avgTime = results.average_time_per_question_seconds;
     if (avgTime === null || avgTime === undefined) {
@@ -83,7 +89,7 @@ async function displayResults(results) {
                     <p style="margin: 5px 0; color: #666;">Total Questions</p>
                 </div>
                 <div style="text-align: center;">
-                    <h3 style="margin: 0; color: #ffc107; font-size: 2rem;">${answeredQuestions.length > 0 ? ((score / answeredQuestions.length) * 100).toFixed(1) : 0}%</h3>
+                    <h3 style="margin: 0; color: #ffc107; font-size: 2rem;">${answeredQuestions.length > 0 ? ((correctCount / answeredQuestions.length) * 100).toFixed(1) : 0}%</h3>
                     <p style="margin: 5px 0; color: #666;">Percentage</p>
                 </div>
                 <div style="text-align: center;">
@@ -1,9 +1,12 @@
 const tableBody = document.querySelector('#results-table tbody');
 const headers = document.querySelectorAll('#results-table th');
 let allResults = [];
-let sortDirection = {};
+let sortState = { key: 'start_time', direction: 'desc' };
+let nextCursor = null;
+const PAGE_SIZE = 50;
+const loadMoreButton = document.getElementById('load-more');
 
-async function fetchAllResults() {
+async function fetchAllResults(append = false) {
     const userId = localStorage.getItem('user_id'); 
     if (!userId) {
         // Show a message instead of redirecting
@@ -11,8 +14,14 @@ async function fetchAllResults() {
         return;
     }
 
+    // Sorting and paging happen on the server; each request returns one page
+    const params = new URLSearchParams({ sort: sortState.key, direction: sortState.direction, limit: PAGE_SIZE });
+    if (append && nextCursor) {
+        params.set('cursor', nextCursor);
+    }
+
     try {
-        const response = await fetch(`/get_user_results/${userId}`);
+        const response = await fetch(`/get_user_results/${userId}?${params}`);
         if (!response.ok) {
             if (response.status === 404) {
                 tableBody.innerHTML = '<tr><td colspan="4" style="text-align: center;">No exam results found for this user.</td></tr>';
@@ -21,7 +30,12 @@ async function fetchAllResults() {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
         
-        allResults = await response.json();
+        const page = await response.json();
+        allResults = append ? allResults.concat(page.items) : page.items;
+        nextCursor = page.next_cursor;
+        if (loadMoreButton) {
+            loadMoreButton.style.display = page.has_more ? '' : 'none';
+        }
         
         if (allResults.length === 0) {
             tableBody.innerHTML = '<tr><td colspan="4" style="text-align: center;">No exam results found.</td></tr>';
@@ -39,28 +53,11 @@ function renderTable(data) {
     tableBody.innerHTML = '';
     data.forEach((result, index) => {
         const row = document.createElement('tr');
-        
-        // Calculate score if not already calculated
-        let score = result.score;
-        if (score === null || score === undefined) {
-            score = 0;
-            if (result.answered_questions) {
-                score = result.answered_questions.filter(q => q.is_correct).length;
-            }
-        }
-        
-        // Calculate average time if not already calculated
-        let avgTime = result.average_time_per_question_seconds;
-        if (avgTime === null || avgTime === undefined) {
-            avgTime = 0;
-            if (result.answered_questions && result.answered_questions.length > 0) {
-                const totalTime = result.answered_questions.reduce((sum, q) => sum + (q.time_taken_seconds || 0), 0);
-                avgTime = totalTime / result.answered_questions.length;
-            }
-        }
+        const score = result.score ?? 0;
+        const avgTime = result.average_time_per_question_seconds ?? 0;
         
         row.innerHTML = `
-            <td>${score} / ${result.answered_questions ? result.answered_questions.length : 0}</td>
+            <td>${score} / ${result.answers_count || 0}</td>
             <td>${new Date(result.start_time).toLocaleString()}</td>
             <td>${avgTime.toFixed(2)}s</td>
             <td>${result.alt_tab_count || 0}</td>
@@ -70,23 +67,10 @@ function renderTable(data) {
 }
 
 function sortTable(key) {
-    const direction = sortDirection[key] === 'asc' ? 'desc' : 'asc';
-    sortDirection = { [key]: direction };
-
-    allResults.sort((a, b) => {
-        let aVal = a[key];
-        let bVal = b[key];
-        
-        // Handle null/undefined values
-        if (aVal === null || aVal === undefined) aVal = 0;
-        if (bVal === null || bVal === undefined) bVal = 0;
-        
-        if (aVal < bVal) return direction === 'asc' ? -1 : 1;
-        if (aVal > bVal) return direction === 'asc' ? 1 : -1;
-        return 0;
-    });
-
-    renderTable(allResults);
+    const direction = sortState.key === key && sortState.direction === 'asc' ? 'desc' : 'asc';
+    sortState = { key, direction };
+    nextCursor = null;
+    fetchAllResults();
 }
 
 headers.forEach(header => {
@@ -102,4 +86,8 @@ document.getElementById('host-view').addEventListener('click', () => {
     window.location.href = 'host.html';
 });
 
-window.onload = fetchAllResults; 
\ No newline at end of file
+if (loadMoreButton) {
+    loadMoreButton.addEventListener('click', () => fetchAllResults(true));
+}
+
+window.onload = () => fetchAllResults(); 
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""Buffered violation ingestion.
+
+Violation events are appended to an in-memory buffer and written to the
+``violations`` table in batches, either every ``VIOLATION_FLUSH_INTERVAL``
+seconds or as soon as ``VIOLATION_FLUSH_SIZE`` events are waiting. Each flush
+is one transaction: a bulk INSERT of the events, one atomic
+``alt_tab_count = alt_tab_count + n`` UPDATE per open attempt and one exam_stats
+upsert per exam. Attempts that reach ``MAX_STRIKES`` in that flush are
+terminated before it commits.
+"""
+import asyncio
+import datetime
+import os
+import threading
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import DataError, IntegrityError
+
+import events
+import exam_stats
+import logs
+import models
+import scoring
+from database import AsyncSessionLocal
+
+log = logs.get_logger(__name__)
+
+VIOLATION_FLUSH_INTERVAL = float(os.getenv("VIOLATION_FLUSH_INTERVAL", "1.0"))  # seconds
+VIOLATION_FLUSH_SIZE = int(os.getenv("VIOLATION_FLUSH_SIZE", "500"))
+# Unflushed events kept if the database is unavailable; the oldest are dropped beyond this
+VIOLATION_BUFFER_LIMIT = int(os.getenv("VIOLATION_BUFFER_LIMIT", "50000"))
+
+# Strike violations that end an attempt
+MAX_STRIKES = 3
+
+# Errors that retrying the same rows cannot fix (constraint violations, bad values)
+PERMANENT_ERRORS = (IntegrityError, DataError)
+
+
+class ViolationBuffer:
+    def __init__(self, flush_interval=VIOLATION_FLUSH_INTERVAL, flush_size=VIOLATION_FLUSH_SIZE,
+                 limit=VIOLATION_BUFFER_LIMIT):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._rows = []
+        self._strikes = {}  # attempt_id -> strike events waiting in the buffer
+        self._inflight = {}  # attempt_id -> strike events taken by a flush that has not committed yet
+        self._flush_lock = None
+        self._wakeup = None
+        self._loop = None
+        self._task = None
+        self.flushed = 0
+        self.dropped = 0
+
+    def record(self, attempt_id, violation_type, description, strike=True):
+        """Buffer one event (safe from any thread); returns the attempt's unflushed strike count"""
+        row = {
+            "exam_attempt_id": attempt_id,
+            "violation_type": violation_type,
+            "description": description,
+            "timestamp": datetime.datetime.utcnow(),
+            "strike": strike,
+        }
+        with self._lock:
+            self._rows.append(row)
+            if strike:
+                self._strikes[attempt_id] = self._strikes.get(attempt_id, 0) + 1
+            pending_strikes = self._strikes.get(attempt_id, 0) + self._inflight.get(attempt_id, 0)
+            full = len(self._rows) >= self.flush_size
+        if full and self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return pending_strikes
+
+    def pending(self):
+        with self._lock:
+            return len(self._rows)
+
+    def _take(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+            # Still counted by record() until the flush commits
+            self._inflight, self._strikes = self._strikes, {}
+        return rows
+
+    def _committed(self, attempt_ids=None):
+        """Stop counting in-flight strikes once stored (all of them, or the given attempts')"""
+        with self._lock:
+            if attempt_ids is None:
+                self._inflight = {}
+            for attempt_id in attempt_ids or ():
+                self._inflight.pop(attempt_id, None)
+
+    def _restore(self, rows):
+        """Put a failed batch back in front of newer events, within the buffer limit"""
+        with self._lock:
+            self._inflight = {}
+            self._rows = rows + self._rows
+            overflow = len(self._rows) - self.limit
+            if overflow > 0:
+                self._rows = self._rows[overflow:]
+                self.dropped += overflow
+            self._strikes = {}
+            for row in self._rows:
+                if row["strike"]:
+                    self._strikes[row["exam_attempt_id"]] = self._strikes.get(row["exam_attempt_id"], 0) + 1
+
+    async def flush(self):
+        """Write everything buffered so far; returns the IDs of attempts terminated by this flush"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            rows = self._take()
+            if not rows:
+                return []
+            try:
+                terminated = await self._write(rows)
+            except PERMANENT_ERRORS:
+                return await self._write_isolated(rows)
+            except Exception:
+                log.exception("Violation flush failed; events kept for the next flush", events=len(rows))
+                self._restore(rows)
+                return []
+            self._committed()
+            self.flushed += len(rows)
+            return terminated
+
+    async def _write_isolated(self, rows):
+        """Retry a rejected batch one attempt at a time, dropping the attempts the database refuses.
+
+        Keeps one bad row (e.g. an attempt ID that no longer exists) from
+        blocking every later flush.
+        """
+        groups = {}
+        for row in rows:
+            groups.setdefault(row["exam_attempt_id"], []).append(row)
+        terminated = []
+        remaining = list(groups.values())
+        while remaining:
+            group = remaining.pop(0)
+            try:
+                terminated += await self._write(group)
+            except PERMANENT_ERRORS:
+                log.exception("Violation events rejected by the database; dropped",
+                              attempt_id=group[0]["exam_attempt_id"], events=len(group))
+                self.dropped += len(group)
+                self._committed([group[0]["exam_attempt_id"]])
+                continue
+            except Exception:
+                log.exception("Violation flush failed; events kept for the next flush",
+                              events=sum(len(rest) for rest in remaining) + len(group))
+                self._restore([row for rest in [group] + remaining for row in rest])
+                return terminated
+            self.flushed += len(group)
+            self._committed([group[0]["exam_attempt_id"]])
+        return terminated
+
+    async def _write(self, rows):
+        strikes = {}
+        for row in rows:
+            if row["strike"]:
+                strikes[row["exam_attempt_id"]] = strikes.get(row["exam_attempt_id"], 0) + 1
+
+        attempt = models.ExamAttempt
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(models.Violation), [
+                {key: row[key] for key in ("exam_attempt_id", "violation_type", "description", "timestamp")}
+                for row in rows
+            ])
+            # Ended attempts keep their final count (their analysis is cached);
+            # the events are still stored
+            for attempt_id, count in list(strikes.items()):
+                counted = await db.execute(
+                    update(attempt).where(attempt.id == attempt_id, attempt.end_time.is_(None))
+                    .values(alt_tab_count=func.coalesce(attempt.alt_tab_count, 0) + count)
+                    .execution_options(synchronize_session=False)
+                )
+                if counted.rowcount != 1:
+                    del strikes[attempt_id]
+
+            terminated = []
+            if strikes:
+                reached = (await db.execute(
+                    select(attempt).where(
+                        attempt.id.in_(list(strikes)),
+                        attempt.alt_tab_count >= MAX_STRIKES,
+                        attempt.end_time.is_(None),
+                    )
+                )).scalars().all()
+                end_time = datetime.datetime.utcnow()
+                for exam_attempt in reached:
+                    # end_exam may have closed it since the SELECT; only the closer counts it
+                    closed = await db.execute(scoring.close_attempt_statement(exam_attempt.id, end_time))
+                    if closed.rowcount == 1:
+                        scoring.finalize_attempt(exam_attempt, end_time)
+                        terminated.append(exam_attempt)
+
+                # exam_stats deltas, one upsert per exam
+                deltas = {}
+                for attempt_id, exam_id in (await db.execute(
+                    select(attempt.id, attempt.exam_session_id).where(attempt.id.in_(list(strikes)))
+                )).all():
+                    deltas.setdefault(exam_id, {"violations": 0})["violations"] += strikes[attempt_id]
+                for exam_attempt in terminated:
+                    exam_deltas = deltas.setdefault(exam_attempt.exam_session_id, {"violations": 0})
+                    exam_deltas["active"] = exam_deltas.get("active", 0) - 1
+                    exam_deltas["completed"] = exam_deltas.get("completed", 0) + 1
+                for exam_id, exam_deltas in deltas.items():
+                    await exam_stats.record_async(db, exam_id, **exam_deltas)
+            await db.commit()
+
+        for exam_attempt in terminated:
+            log.info("Attempt terminated after violations", attempt_id=exam_attempt.id,
+                     alt_tab_count=exam_attempt.alt_tab_count)
+            events.broker.publish(
+                "attempt_completed", exam_attempt.exam_session_id,
+                attempt_id=exam_attempt.id, score=exam_attempt.score, terminated=True
+            )
+        return [exam_attempt.id for exam_attempt in terminated]
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        """Start the periodic flusher on the running event loop"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._loop = None
+
+
+buffer = ViolationBuffer()